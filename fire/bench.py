@@ -0,0 +1,231 @@
+import inspect
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+import tracemalloc
+
+from clifire import application, command, daemon, out
+
+FIRE_HELLO = """
+from clifire import command, out
+
+
+@command.fire
+def hello(cmd):
+    out.info('Hello')
+"""
+
+
+def _legacy_fire(func):
+    def wrapper(*args, **kwargs):
+        cmd = args[0]
+        signature = inspect.signature(func)
+        for arg in list(signature.parameters.keys())[1:]:
+            var = arg[1:] if arg.startswith('_') else arg
+            if hasattr(cmd, var):
+                kwargs[arg] = getattr(cmd, var)
+        return func(*args, **kwargs)
+
+    return wrapper
+
+
+def _timeit(func, number: int) -> float:
+    return min(timeit.repeat(func, number=number, repeat=5)) / number
+
+
+@command.fire
+def bench_binding(cmd, number: int = 100000):
+    '''
+    Measure the per-call cost of the `@command.fire` parameter binding
+
+    Args:
+        number: Number of calls for each measure
+    '''
+
+    def sample(cmd, user: str = '', age: int = 0, _sudo: bool = False):
+        return user
+
+    current_app = application.App.current_app
+    try:
+        application.App(command_help=None, command_version=None)
+        wrapper = command.fire(sample)
+        cls = application.App.current_app.commands['sample']
+    finally:
+        application.App.current_app = current_app
+    instance = cls(cmd.app)
+    instance.parse('sample Rob 18 --sudo')
+    legacy = _legacy_fire(sample)
+
+    data = []
+    for name, func in (('legacy', legacy), ('fire', wrapper)):
+        seconds = _timeit(lambda f=func: f(instance), number)
+        data.append({'binding': name, 'per_call_us': round(seconds * 1e6, 3)})
+    speedup = data[0]['per_call_us'] / data[1]['per_call_us']
+    out.table(data, border=False)
+    out.success(
+        f'Binding resolved at decoration time is {speedup:.1f}x faster'
+    )
+
+
+def _measure(func, number: int) -> float:
+    start = time.perf_counter()
+    for _ in range(number):
+        func()
+    return (time.perf_counter() - start) / number * 1000
+
+
+@command.fire
+def bench_startup(cmd, number: int = 20):
+    '''
+    Compare the latency of a cold run with the daemon and fork server
+
+    Args:
+        number: Number of runs for each measure
+    '''
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    with tempfile.TemporaryDirectory() as project:
+        fire_path = os.path.join(project, 'fire')
+        os.makedirs(fire_path)
+        with open(os.path.join(fire_path, 'hello.py'), 'w') as file:
+            file.write(FIRE_HELLO)
+        argv = [sys.executable, '-m', 'clifire.main', 'hello']
+
+        def run():
+            subprocess.run(
+                argv, cwd=project, env=env, stdout=subprocess.DEVNULL
+            )
+
+        data = [{'mode': 'cold', 'process_ms': _measure(run, number)}]
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        for mode, args in (('daemon', []), ('fork server', ['--fork'])):
+            server = subprocess.Popen(
+                argv[:-1] + ['--daemon'] + args,
+                cwd=project,
+                env=env,
+                stdout=subprocess.DEVNULL,
+            )
+            try:
+                while not os.path.exists(daemon.socket_path(fire_path)):
+                    time.sleep(0.01)
+                process_ms = _measure(run, number)
+                forward_ms = _measure(
+                    lambda: daemon.forward(
+                        fire_path, ['hello'], fds=(0, devnull, devnull)
+                    ),
+                    number,
+                )
+            finally:
+                server.terminate()
+                server.wait()
+            data.append(
+                {
+                    'mode': mode,
+                    'process_ms': process_ms,
+                    'forward_ms': forward_ms,
+                }
+            )
+        os.close(devnull)
+    for row in data:
+        for key in ('process_ms', 'forward_ms'):
+            row[key] = f'{row[key]:.2f}' if key in row else '-'
+    out.table(data, border=False)
+
+
+@command.fire
+def bench_shell(cmd, number: int = 200):
+    '''
+    Compare `App.shell` with a persistent `App.shell_session`
+
+    Args:
+        number: Number of commands for each measure
+    '''
+    shell_ms = _measure(lambda: cmd.app.shell('true'), number)
+    with cmd.app.shell_session() as session:
+        session_ms = _measure(lambda: session.shell('true'), number)
+    data = [
+        {'mode': 'shell', 'per_call_ms': f'{shell_ms:.3f}'},
+        {'mode': 'session', 'per_call_ms': f'{session_ms:.3f}'},
+    ]
+    out.table(data, border=False)
+    out.success(f'A shell session is {shell_ms / session_ms:.1f}x faster')
+
+
+def _profile(func):
+    with out.use_console(out.capture_console(width=120)):
+        start = time.perf_counter()
+        func()
+        seconds = time.perf_counter() - start
+        tracemalloc.start()
+        try:
+            func()
+            return seconds, tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+
+@command.fire
+def bench_table(cmd, number: int = 20000):
+    '''
+    Compare `out.table` with the streaming `out.table_stream`
+
+    Args:
+        number: Number of rows of the table
+    '''
+
+    def rows():
+        for i in range(number):
+            yield {'name': f'user{i}', 'age': i % 100, 'email': f'{i}@x.org'}
+
+    data = []
+    for mode, func in (
+        ('table', lambda: out.table(list(rows()), border=False)),
+        ('table_stream', lambda: out.table_stream(rows(), border=False)),
+    ):
+        seconds, peak = _profile(func)
+        data.append(
+            {
+                'mode': mode,
+                'seconds': f'{seconds:.2f}',
+                'peak_mb': f'{peak / 1024 / 1024:.1f}',
+            }
+        )
+    out.table(data, border=False)
+
+
+@command.fire
+def bench_output(cmd, number: int = 50000):
+    '''
+    Compare the lines per second of the rich and plain output backends
+
+    Args:
+        number: Number of lines for each measure
+    '''
+    from rich.console import Console
+
+    plain = out.PLAIN
+    data = []
+    devnull = open(os.devnull, 'w')
+    console = Console(
+        file=devnull, no_color=True, soft_wrap=False, width=10000
+    )
+    try:
+        with out.use_console(console):
+            for backend in ('rich', 'plain'):
+                out.PLAIN = backend == 'plain'
+                start = time.perf_counter()
+                for i in range(number):
+                    out.info(f'Processed item {i}')
+                seconds = time.perf_counter() - start
+                data.append(
+                    {
+                        'backend': backend,
+                        'lines_per_second': f'{number / seconds:,.0f}',
+                    }
+                )
+    finally:
+        out.PLAIN = plain
+        devnull.close()
+    out.table(data, border=False)
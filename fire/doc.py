@@ -3,13 +3,13 @@ import os
 from clifire import command, out
 
 
-@command.fire
+@command.fire(inputs=['docs/docs', 'docs/mkdocs.yml'], outputs=['docs/site'])
 def doc_build(cmd):
     '''
     Build the docs
     '''
     bash = 'rye run mkdocs build'
-    cmd.app.shell(bash, path='./docs', capture_output=False)
+    return cmd.app.shell(bash, path='./docs', capture_output=False).code
 
 
 @command.fire
@@ -30,11 +30,11 @@ def doc_record(cmd, filename: str, _force: bool = False):
         filename: name of the file with which you want to record the session
         -f, --force: remove files if already exists
     '''
-    result = cmd.app.shell('which asciinema')
+    result = cmd.app.shell('which asciinema', cache=3600)
     if not result.stdout:
         out.warn('You can install with `apt install asciinema`')
         out.critical('`asciinema` not found.')
-    result = cmd.app.shell('which svg-term')
+    result = cmd.app.shell('which svg-term', cache=3600)
     if not result.stdout:
         out.warn('You can install with `npm install -g svg-term-cli`')
         out.critical('`svg-term` not found.', code=2)
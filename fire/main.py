@@ -14,10 +14,10 @@ def install(cmd, _global: False):
     '''
     install_path = cmd.app.path('~/.local/bin')
     if not os.path.exists(install_path):
-        out.debug2(f'Install path {install_path} not exist')
+        out.debug2('Install path %s not exist', install_path)
         install_path = cmd.app.path('/usr/local/bin')
     if not os.path.exists(install_path):
-        out.debug2(f'Install path {install_path} not exist')
+        out.debug2('Install path %s not exist', install_path)
         out.critical('No path for install')
     fire_path = f'{install_path}/fire'
     out.info(f'Command available at {fire_path}')
@@ -42,22 +42,25 @@ def install(cmd, _global: False):
     out.success('Installation completed!')
 
 
-@command.fire
+@command.fire(depends=['build package', 'doc build'])
 def build(cmd):
     '''
     Build the package and documentation
     '''
-    live = out.LiveText('Building ...')
+    out.success('Build success')
+
+
+@command.fire
+def build_package(cmd):
+    '''
+    Build the package
+    '''
     res = cmd.app.shell('rye build')
-    if res:
-        live.success('Build success')
-    else:
-        live.error('Error on building packages.')
+    if not res:
+        out.error('Error on building packages.')
         out.error(res.stderr)
         return 1
-
-    live.info('Building the docs ..')
-    cmd.app.fire('doc build')
+    out.success('Package built')
 
 
 @command.fire
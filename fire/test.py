@@ -19,10 +19,11 @@ def test_legacy(cmd, _build: bool = False, python_version: str = '3.8.2'):
             f'-t {image_name} .',
             capture_output=False,
         )
+        cmd.app.shell_cache_clear('docker images')
 
     if _build:
         docker_build()
-    elif image_name not in cmd.app.shell('docker images').stdout:
+    elif image_name not in cmd.app.shell('docker images', cache=600).stdout:
         docker_build()
 
     volumen_str = '-v ./src:/app/src -v ./tests:/app/tests'
@@ -15,7 +15,7 @@ def update_version(cmd):
     if match is None:
         out.critical(f'Version not detected {pyproject_path}')
     version = match.group(1)
-    out.debug(f'Version "{version}" in {pyproject_path}')
+    out.debug('Version "%s" in %s', version, pyproject_path)
     with open(cmd.app.path('src/clifire/main.py')) as f:
         content = f.read()
     new_content = re.sub(
@@ -1,10 +1,20 @@
+import contextvars
 import os
 import shlex
+import signal
 import subprocess
 import sys
-from typing import Any, Dict, List, Type
+import threading
+import traceback
+from concurrent import futures
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Type, Union
 
-from clifire import command, commands, config, out, result, template
+from clifire import command, commands, config, index, out, result, template
+from clifire.cache import ShellCache, default_folder
+from clifire.session import ShellSession
+from clifire.stream import TAIL, LineCallback, Stream
+
+_context_options = contextvars.ContextVar('options', default=None)
 
 
 class App:
@@ -23,10 +33,12 @@ class App:
         command_version=commands.version.CommandVersion,
         template_folder=None,
         show_messages_with_icons: bool = True,
+        cache_folder: str = None,
     ):
         App.current_app = self
         self.name = name
         self.version = version
+        self.cache_folder = cache_folder
         self.options = {}
         if option_verbose:
             self._add_option_verbose()
@@ -40,7 +52,7 @@ class App:
         self.config = config.Config.get_config(
             config_files, create=config_create, **context
         )
-        self.commands = {}
+        self.commands = index.CommandIndex()
         if command_help:
             self.add_option(
                 'help',
@@ -79,10 +91,66 @@ class App:
                 default=False,
             ),
         )
+        self.add_option(
+            'output',
+            command.Field(
+                help='Output format: text, json or ndjson',
+                default='text',
+            ),
+        )
         command_line = sys.argv[1:]
         if '--no-ansi' in command_line:
             self.set_option('no_ansi', True)
 
+    def _after_command(self, tokens: List[str], name: str) -> bool:
+        flag = f'--{name}'
+        args = [i for i, p in enumerate(tokens) if not p.startswith('-')]
+        return bool(args) and any(
+            p == flag or p.startswith(f'{flag}=') for p in tokens[args[0] :]
+        )
+
+    def _owns_option(self, tokens: List[str], name: str) -> bool:
+        if not self._after_command(tokens, name):
+            return False
+        args = [p for p in tokens if not p.startswith('-')]
+        cls = self.commands.longest_match(args)
+        options = cls._get_schema().options if cls else {}
+        return isinstance(options.get(name), command.Field)
+
+    def _get_output(self, tokens: List[str]) -> Optional[str]:
+        if 'output' not in self.options:
+            return None
+        if self._owns_option(tokens, 'output'):
+            return None
+        return command.pop_option(list(tokens), '--output')
+
+    def _setup_output(self, tokens: List[str], setup_output: bool = True):
+        output = self._get_output(tokens)
+        invalid = output is not None and output not in out.OUTPUT_FORMATS
+        if output is not None:
+            self.set_option('output', 'text' if invalid else output)
+        if setup_output:
+            out.setup(
+                not self.get_option('no_ansi'),
+                show_icons=self.show_messages_with_icons,
+                verbose=self.get_option('verbose'),
+                output=self.get_option('output', 'text'),
+            )
+        if invalid:
+            formats = ', '.join(out.OUTPUT_FORMATS)
+            out.critical(
+                f'Invalid output format "{output}", use one of: {formats}',
+                code=40,
+            )
+
+    def _check_output(self, option: str):
+        if out.OUTPUT == 'json':
+            out.critical(
+                f'--output json prints a single document and can not be '
+                f'used with --{option}, use --output ndjson',
+                code=40,
+            )
+
     def add_option(self, name: str, field: command.Field):
         self.options[name] = field
         for alias in field.alias:
@@ -95,15 +163,32 @@ class App:
                 )
             self.options[alias] = name
 
+    def _context_values(self) -> Optional[Dict[str, Any]]:
+        context = _context_options.get()
+        if context is None or context[0] is not self:
+            return None
+        return context[1]
+
     def set_option(self, name: str, value):
         if name not in self.options:
             return False
+        values = self._context_values()
+        if values is not None:
+            values[name] = value
+            if name == 'verbose':
+                out.set_context_verbose(value)
+            return True
         self.options[name].value = value
+        if name == 'verbose' and App.current_app is self:
+            out.set_verbose(value, self)
         return True
 
     def get_option(self, name: str, default=None):
         if name not in self.options:
             return default
+        values = self._context_values()
+        if values is not None and name in values:
+            return values[name]
         return self.options[name].value
 
     def add_command(self, cls: Type[command.Command]):
@@ -117,8 +202,10 @@ class App:
         for cmd in commands:
             self.add_command(cmd)
 
-    def _split_command_line(self, command_line: str) -> list:
-        params = shlex.split(command_line)
+    def _split_command_line(
+        self, command_line: Union[str, List[str]]
+    ) -> List[str]:
+        params = command.tokenize(command_line)
         args = [p for p in params if not p.startswith('-')]
         if 'help' in self.commands and 'help' not in params:
             if '--help' in params:
@@ -135,58 +222,168 @@ class App:
             self.set_option('no_ansi', True)
         return params
 
-    def _clean_command_line(self, command_line: str) -> str:
-        return shlex.join(self._split_command_line(command_line))
-
-    def find_command(self, command_line: str):
-        empty = False
-        args = [
-            p
-            for p in self._split_command_line(command_line)
-            if not p.startswith('-')
-        ]
-        if not args:
-            args = ['help']
-            empty = True
-        while args:
-            command_name = '.'.join(args)
-            if command_name in self.commands:
-                return self.commands[command_name]
-            args.pop()
-        if empty:
+    def find_command(self, command_line: Union[str, List[str]]):
+        return self._find_command(self._split_command_line(command_line))
+
+    def _find_command(self, tokens: List[str]):
+        args = [p for p in tokens if not p.startswith('-')]
+        cls = self.commands.longest_match(args or ['help'])
+        if cls is None and not args:
             out.critical('No command provided.', code=10)
-        return None
+        return cls
+
+    def get_command(
+        self, command_line: Union[str, List[str]]
+    ) -> command.Command:
+        return self._get_command(self._split_command_line(command_line))
 
-    def get_command(self, command_line: str) -> command.Command:
-        command_line = self._clean_command_line(command_line)
-        cls = self.find_command(command_line)
+    def _get_command(self, tokens: List[str]) -> command.Command:
+        cls = self._find_command(tokens)
         if cls:
-            return cls(self, command_line)
-        args = [p for p in shlex.split(command_line) if not p.startswith('-')]
+            return cls(self, tokens)
+        args = [p for p in tokens if not p.startswith('-')]
         while args:
-            group = '.'.join(args + [''])
-            commands = [k for k in self.commands.keys() if k.startswith(group)]
-            if commands:
-                cls = self.find_command('help')
+            if self.commands.is_group(args):
+                cls = self._find_command(['help'])
                 if cls:
-                    return cls(self, f'help {command_line}')
+                    return cls(self, ['help'] + tokens)
             last_arg = args.pop()
         out.critical(f'Command "{last_arg}" not found.', code=20)
 
     def fire(self, command_line: str = None):
+        if command_line is None:
+            out.debug('Sys argv value: %s', sys.argv)
+            return self.fire_argv(sys.argv[1:])
+        return self.fire_argv(shlex.split(command_line))
+
+    def fire_many(
+        self, command_lines: Iterable[Union[str, List[str]]]
+    ) -> List[int]:
+        values = self._get_option_values()
+        codes = []
+        try:
+            for command_line in command_lines:
+                self._set_option_values(values)
+                codes.append(self._fire_code(command_line)[0])
+        finally:
+            self._set_option_values(values)
+        return codes
+
+    def _fire_code(
+        self,
+        command_line: Union[str, List[str]],
+        setup_output: bool = True,
+    ) -> Tuple[int, Optional[Exception]]:
+        code, exception = 0, None
         try:
-            if command_line is None:
-                out.debug(f'Sys argv value: {sys.argv}')
-                command_line = shlex.join(sys.argv[1:])
+            self._fire_argv(command.tokenize(command_line), setup_output)
+        except SystemExit as e:
+            if e.code is None or isinstance(e.code, int):
+                code = e.code or 0
             else:
-                command_line = self._clean_command_line(command_line)
-            cmd = self.get_command(command_line)
-            out.setup(
-                not self.get_option('no_ansi'),
-                show_icons=self.show_messages_with_icons,
-                verbose=self.get_option('verbose'),
+                out.error(e.code)
+                code = 1
+        except Exception as e:
+            out.error(f'{type(e).__name__}: {e}')
+            code, exception = 1, e
+        out.finish(code)
+        return code, exception
+
+    def run(
+        self, argv: Union[str, List[str]], capture: bool = True
+    ) -> result.Result:
+        values = self._get_option_values()
+        return contextvars.copy_context().run(self._run, argv, capture, values)
+
+    def _run(
+        self,
+        argv: Union[str, List[str]],
+        capture: bool,
+        values: Dict[str, Any],
+    ) -> result.Result:
+        _context_options.set((self, values))
+        out.set_context_verbose(values.get('verbose'))
+        console = out.capture_console() if capture else None
+        with out.use_console(console):
+            code, exception = self._fire_code(argv, setup_output=False)
+            stderr = ''
+            if exception is not None:
+                stderr = ''.join(
+                    traceback.format_exception(
+                        type(exception), exception, exception.__traceback__
+                    )
+                )
+            stdout = console.file.getvalue() if capture else ''
+            return result.Result(code, stdout, stderr, exception=exception)
+
+    def fire_each(self, argv: List[str], filename: str):
+        if filename != '-' and not os.path.isfile(filename):
+            out.critical(f'File "{filename}" not found.')
+        if filename == '-':
+            lines = sys.stdin.read().splitlines()
+        else:
+            with open(filename, encoding='utf-8') as file:
+                lines = file.read().splitlines()
+        items = [line.strip() for line in lines]
+        items = [item for item in items if item and not item.startswith('#')]
+        jobs = max(1, self.get_option('jobs', 1) or 1)
+        out.debug(lambda: f'Run "{shlex.join(argv)}" for {len(items)} items')
+        failures = []
+        contexts = [contextvars.copy_context() for _ in items]
+        with futures.ThreadPoolExecutor(max_workers=jobs) as pool:
+            results = pool.map(
+                lambda context, item: context.run(self.run, argv + [item]),
+                contexts,
+                items,
             )
-            res = cmd.launch(cmd.command_line)
+            for item, res in zip(items, results):
+                out.rule(item)
+                console = out.get_console()
+                if res.stdout:
+                    console.print(res.stdout, markup=False, highlight=False)
+                if res.stderr:
+                    console.print(
+                        res.stderr,
+                        style=out.COLOR_ERROR,
+                        markup=False,
+                        highlight=False,
+                    )
+                if res.code:
+                    failures.append({'item': item, 'code': str(res.code)})
+        if failures:
+            out.table(failures, title='Failed items', border=False)
+            out.critical(f'{len(failures)} of {len(items)} items failed.')
+        out.success(f'{len(items)} items executed.')
+
+    def _get_option_values(self) -> Dict[str, Any]:
+        return {
+            name: self.get_option(name)
+            for name, field in self.options.items()
+            if isinstance(field, command.Field)
+        }
+
+    def _set_option_values(self, values: Dict[str, Any]):
+        for name, value in values.items():
+            self.set_option(name, value)
+
+    def fire_argv(self, argv: List[str]):
+        with out.finishing():
+            self._fire_argv(argv)
+
+    def _fire_argv(self, argv: List[str], setup_output: bool = True):
+        each = None
+        if 'each' in self.options and not self._owns_option(argv, 'each'):
+            argv = list(argv)
+            each = command.pop_option(argv, '--each')
+        try:
+            tokens = self._split_command_line(argv)
+            self._setup_output(tokens, setup_output)
+            cmd = self._get_command(tokens)
+            if each is not None:
+                self._check_output('each')
+                cmd._parse_tokens(cmd.tokens)
+                return self.fire_each(cmd._local_tokens(cmd.tokens), each)
+            res = cmd.launch(cmd.tokens)
             if type(res) is int and res != 0:
                 sys.exit(res)
         except command.CommandException as e:
@@ -206,28 +403,282 @@ class App:
         path: str = None,
         shell: bool = True,
         check: bool = False,
+        on_line: LineCallback = None,
+        tee: bool = False,
+        tail: int = None,
+        cache: float = None,
     ) -> result.Result:
-        pwd = os.getcwd()
+        if cache is not None and capture_output:
+            shell_cache = cls.shell_cache()
+            key = shell_cache.key(cmd, env=env, path=path, shell=shell)
+            res = shell_cache.get(key, cache)
+            if res is None:
+                res = cls.shell(cmd, env=env, path=path, shell=shell)
+                if res:
+                    shell_cache.set(key, cmd, res)
+            if check and res.code:
+                return result.ResultError(res.stderr, res.code)
+            return res
+        if on_line or tee or tail is not None:
+            with cls.shell_stream(
+                cmd,
+                env=env,
+                path=path,
+                shell=shell,
+                on_line=on_line,
+                tee=tee,
+                tail=TAIL if tail is None else tail,
+            ) as lines:
+                res = lines.wait()
+            if check and res.code:
+                return result.ResultError(res.stderr, res.code)
+            return res
         try:
             if path:
-                out.debug(f'Shell path: {path}')
-                os.chdir(path)
-            env_vars = os.environ.copy()
-            if env:
-                env_vars.update(env)
-            out.debug(f'Shell: {cmd}')
+                out.debug('Shell path: %s', path)
+            out.debug('Shell: %s', cmd)
             proc = subprocess.run(
                 cmd if shell else shlex.split(cmd),
                 shell=shell,
                 capture_output=capture_output,
-                env=env_vars,
+                env=cls._shell_env(env),
+                cwd=path,
                 check=check,
             )
             return result.Result(proc.returncode, proc.stdout, proc.stderr)
         except subprocess.CalledProcessError as e:
             return result.ResultError(e.stderr, e.returncode)
-        finally:
-            os.chdir(pwd)
+
+    @classmethod
+    def get_cache_folder(cls) -> str:
+        folder = cls.current_app.cache_folder if cls.current_app else None
+        return folder or default_folder()
+
+    @classmethod
+    def shell_cache(cls) -> ShellCache:
+        return ShellCache(cls.get_cache_folder())
+
+    @classmethod
+    def shell_cache_clear(cls, cmd: str = None) -> int:
+        return cls.shell_cache().clear(cmd)
+
+    @classmethod
+    def pipe(
+        cls,
+        *cmds: Union[str, List[str]],
+        capture_output: bool = True,
+        env: dict = None,
+        path: str = None,
+        shell: bool = False,
+        check: bool = False,
+    ) -> result.PipeResult:
+        if not cmds:
+            raise ValueError('App.pipe needs at least one command')
+        if path:
+            out.debug('Shell path: %s', path)
+        out.debug(lambda: f'Pipe: {" | ".join(map(str, cmds))}')
+        env_vars = cls._shell_env(env)
+        procs = []
+        stdin = None
+        try:
+            for i, cmd in enumerate(cmds):
+                last = i == len(cmds) - 1
+                if not shell and isinstance(cmd, str):
+                    cmd = shlex.split(cmd)
+                capture = capture_output and last
+                proc = subprocess.Popen(
+                    cmd,
+                    shell=shell,
+                    stdin=stdin,
+                    stdout=subprocess.PIPE if capture or not last else None,
+                    stderr=subprocess.PIPE if capture else None,
+                    env=env_vars,
+                    cwd=path,
+                )
+                if stdin is not None:
+                    stdin.close()
+                stdin = proc.stdout
+                procs.append(proc)
+        except BaseException:
+            if stdin is not None:
+                stdin.close()
+            for proc in procs:
+                proc.kill()
+                proc.wait()
+            raise
+        stdout, stderr = procs[-1].communicate()
+        res = result.PipeResult(
+            [proc.wait() for proc in procs], stdout, stderr
+        )
+        if check and res.code:
+            return result.ResultError(res.stderr, res.code)
+        return res
+
+    @classmethod
+    def shell_session(cls, env: dict = None, path: str = None) -> ShellSession:
+        if path:
+            out.debug('Shell path: %s', path)
+        return ShellSession(env=cls._shell_env(env), path=path)
+
+    @classmethod
+    def shell_stream(
+        cls,
+        cmd: str,
+        env: dict = None,
+        path: str = None,
+        shell: bool = True,
+        on_line: LineCallback = None,
+        on_stderr: LineCallback = None,
+        tee: bool = False,
+        tail: int = TAIL,
+    ) -> Stream:
+        if path:
+            out.debug('Shell path: %s', path)
+        out.debug('Shell: %s', cmd)
+        proc = subprocess.Popen(
+            cmd if shell else shlex.split(cmd),
+            shell=shell,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            env=cls._shell_env(env),
+            cwd=path,
+            text=True,
+            errors='replace',
+        )
+        return Stream(
+            proc, on_line=on_line, on_stderr=on_stderr, tee=tee, tail=tail
+        )
+
+    @classmethod
+    async def ashell(
+        cls,
+        cmd: str,
+        capture_output: bool = True,
+        env: dict = None,
+        path: str = None,
+        shell: bool = True,
+        check: bool = False,
+    ) -> result.Result:
+        import asyncio
+
+        if path:
+            out.debug('Shell path: %s', path)
+        out.debug('Shell: %s', cmd)
+        pipe = asyncio.subprocess.PIPE if capture_output else None
+        kwargs = {
+            'stdout': pipe,
+            'stderr': pipe,
+            'env': cls._shell_env(env),
+            'cwd': path,
+        }
+        if shell:
+            proc = await asyncio.create_subprocess_shell(cmd, **kwargs)
+        else:
+            proc = await asyncio.create_subprocess_exec(
+                *shlex.split(cmd), **kwargs
+            )
+        try:
+            stdout, stderr = await proc.communicate()
+        except asyncio.CancelledError:
+            if proc.returncode is None:
+                proc.kill()
+                await proc.wait()
+            raise
+        if check and proc.returncode:
+            return result.ResultError(stderr, proc.returncode)
+        return result.Result(proc.returncode, stdout or '', stderr or '')
+
+    @classmethod
+    def _shell_env(cls, env: dict = None) -> dict:
+        out.flush()
+        env_vars = os.environ.copy()
+        if env:
+            env_vars.update(env)
+        return env_vars
+
+    @classmethod
+    def shell_many(
+        cls,
+        cmds: Iterable[str],
+        max_workers: int = None,
+        capture_output: bool = True,
+        env: dict = None,
+        path: str = None,
+        shell: bool = True,
+        fail_fast: bool = False,
+        progress: bool = True,
+    ) -> List[result.Result]:
+        cmds = list(cmds)
+        env_vars = cls._shell_env(env)
+        lock = threading.Lock()
+        running = set()
+        cancelled = threading.Event()
+        done = []
+
+        def run(cmd: str) -> result.Result:
+            with lock:
+                if cancelled.is_set():
+                    return result.ResultError('Cancelled')
+                out.debug('Shell: %s', cmd)
+                pipe = subprocess.PIPE if capture_output else None
+                proc = subprocess.Popen(
+                    cmd if shell else shlex.split(cmd),
+                    shell=shell,
+                    stdout=pipe,
+                    stderr=pipe,
+                    env=env_vars,
+                    cwd=path,
+                    start_new_session=fail_fast,
+                )
+                running.add(proc)
+            try:
+                stdout, stderr = proc.communicate()
+            finally:
+                with lock:
+                    running.discard(proc)
+            res = result.Result(proc.returncode, stdout or '', stderr or '')
+            with lock:
+                done.append(res)
+                if live:
+                    live.info(f'Shell: {len(done)}/{len(cmds)} finished')
+            if fail_fast and not res:
+                cancel()
+            return res
+
+        def cancel():
+            with lock:
+                if cancelled.is_set():
+                    return
+                cancelled.set()
+                for proc in running:
+                    try:
+                        if fail_fast:
+                            os.killpg(proc.pid, signal.SIGKILL)
+                        else:
+                            proc.kill()
+                    except ProcessLookupError:
+                        pass
+
+        live = out.live(f'Shell: 0/{len(cmds)} finished') if progress else None
+        try:
+            with futures.ThreadPoolExecutor(max_workers=max_workers) as pool:
+                jobs = [pool.submit(run, cmd) for cmd in cmds]
+                try:
+                    results = [job.result() for job in jobs]
+                except BaseException:
+                    cancel()
+                    raise
+        except BaseException:
+            if live:
+                live.cancel()
+            raise
+        if live:
+            failed = len([res for res in results if not res])
+            if failed:
+                live.error(f'Shell: {failed} of {len(cmds)} commands failed')
+            else:
+                live.success(f'Shell: {len(cmds)} commands finished')
+        return results
 
     @classmethod
     def path(cls, *args: List[str]) -> str:
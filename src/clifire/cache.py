@@ -0,0 +1,90 @@
+import base64
+import hashlib
+import json
+import os
+import time
+from typing import Optional
+
+from clifire import out, result
+
+CACHE_FOLDER = '.fire-cache'
+CACHE_ENV = ('PATH',)
+
+
+def default_folder() -> str:
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache')
+    digest = hashlib.sha1(os.getcwd().encode()).hexdigest()[:16]
+    return os.path.join(base, 'clifire', digest)
+
+
+class ShellCache:
+    def __init__(self, folder: str):
+        self.folder = folder
+
+    def key(
+        self, cmd: str, env: dict = None, path: str = None, shell=True
+    ) -> str:
+        env_vars = {name: os.environ.get(name) for name in CACHE_ENV}
+        env_vars.update(env or {})
+        data = [cmd, sorted(env_vars.items()), path or os.getcwd(), shell]
+        return hashlib.sha256(json.dumps(data).encode()).hexdigest()
+
+    def filename(self, key: str) -> str:
+        return os.path.join(self.folder, f'{key}.json')
+
+    def get(self, key: str, ttl: float) -> Optional[result.Result]:
+        try:
+            with open(self.filename(key), encoding='utf-8') as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return None
+        if time.time() - data['time'] > ttl:
+            return None
+        out.debug2('Shell cache hit: %s', data['cmd'])
+        return result.Result(
+            data['code'],
+            base64.b64decode(data['stdout']),
+            base64.b64decode(data['stderr']),
+        )
+
+    def set(self, key: str, cmd: str, res: result.Result) -> bool:
+        data = {
+            'time': time.time(),
+            'cmd': cmd,
+            'code': res.code,
+            'stdout': base64.b64encode(res.bytes).decode('ascii'),
+            'stderr': base64.b64encode(res.stderr.encode()).decode('ascii'),
+        }
+        filename = self.filename(key)
+        tmp_filename = f'{filename}.{os.getpid()}.tmp'
+        try:
+            os.makedirs(self.folder, exist_ok=True)
+            with open(tmp_filename, 'w', encoding='utf-8') as file:
+                json.dump(data, file)
+            os.replace(tmp_filename, filename)
+        except OSError:
+            out.debug2('Shell cache %s can not be written', filename)
+            return False
+        return True
+
+    def clear(self, cmd: str = None) -> int:
+        if not os.path.isdir(self.folder):
+            return 0
+        count = 0
+        for file in os.listdir(self.folder):
+            if not file.endswith('.json'):
+                continue
+            filename = os.path.join(self.folder, file)
+            if cmd is not None:
+                try:
+                    with open(filename, encoding='utf-8') as f:
+                        if json.load(f).get('cmd') != cmd:
+                            continue
+                except (OSError, ValueError):
+                    continue
+            try:
+                os.remove(filename)
+                count += 1
+            except OSError:
+                pass
+        return count
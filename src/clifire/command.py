@@ -1,26 +1,69 @@
 import inspect
+import json
+import os
 import re
 import shlex
-from typing import List, Optional, Type, Union
+from typing import List, Optional, Tuple, Type, Union
 
 from clifire import out
 
 
+def tokenize(command_line: Union[str, List[str]]) -> List[str]:
+    if isinstance(command_line, str):
+        return shlex.split(command_line)
+    return list(command_line)
+
+
+def pop_option(argv: List[str], name: str) -> Optional[str]:
+    for index, token in enumerate(argv):
+        if token == name:
+            argv.pop(index)
+            return argv.pop(index) if index < len(argv) else ''
+        if token.startswith(f'{name}='):
+            argv.pop(index)
+            return token[len(name) + 1 :]
+    return None
+
+
 def get_current_app():
     from clifire import application
 
     return application.App.current_app
 
 
-def fire(func):
-    def wrapper(*args, **kwargs):
-        cmd = args[0]
-        signature = inspect.signature(func)
-        for arg in list(signature.parameters.keys())[1:]:
-            var = arg[1:] if arg.startswith('_') else arg
-            if hasattr(cmd, var):
-                kwargs[arg] = getattr(cmd, var)
-        return func(*args, **kwargs)
+def run_coroutine(coroutine):
+    import asyncio
+    from concurrent import futures
+
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine)
+    with futures.ThreadPoolExecutor(max_workers=1) as pool:
+        return pool.submit(asyncio.run, coroutine).result()
+
+
+def fire(
+    func=None,
+    *,
+    inputs: List[str] = None,
+    outputs: List[str] = None,
+    depends: List[str] = None,
+):
+    if func is None:
+        return lambda func: fire(
+            func, inputs=inputs, outputs=outputs, depends=depends
+        )
+    signature = inspect.signature(func)
+    bindings = [
+        (arg, arg[1:] if arg.startswith('_') else arg)
+        for arg in list(signature.parameters.keys())[1:]
+    ]
+
+    def wrapper(cmd, *args, **kwargs):
+        for arg, var in bindings:
+            kwargs[arg] = getattr(cmd, var)
+        return func(cmd, *args, **kwargs)
 
     command_name = getattr(func, '_command_name', func.__name__)
     command_name = re.sub(r'([A-Z_])', '.', command_name).lower()
@@ -33,7 +76,12 @@ def fire(func):
         '_help': doc.splitlines()[0] if doc.splitlines() else doc,
         'fire': wrapper,
     }
-    signature = inspect.signature(func)
+    if inputs:
+        attrs['_inputs'] = list(inputs)
+    if outputs:
+        attrs['_outputs'] = list(outputs)
+    if depends:
+        attrs['_depends'] = list(depends)
     pos = 0
     helps = {k: [] for k in list(signature.parameters.keys())[1:]}
     doc = [d.strip() for d in doc.splitlines() if d]
@@ -109,17 +157,53 @@ class FieldException(Exception):
         super().__init__(f'The {field_type} "{field.name}" {msg}')
 
 
+class Schema:
+    def __init__(self, cls: Type['Command']):
+        fields = {}
+        for klass in reversed(cls.__mro__):
+            for name, value in vars(klass).items():
+                if isinstance(value, Field):
+                    fields[name] = value
+                elif name in fields:
+                    del fields[name]
+        self.fields = {}
+        for name in sorted(fields):
+            field = fields[name]
+            field.name = name
+            self.fields[name] = field
+        self.argument_names = sorted(
+            [key for key, val in self.fields.items() if not val.is_option],
+            key=lambda k: self.fields[k].pos,
+        )
+        self.options = {}
+        for name, field in self.fields.items():
+            if not field.is_option:
+                continue
+            self.options[name] = field
+            for alias in field.alias:
+                if alias.startswith('-'):
+                    alias = alias[2:] if alias.startswith('--') else alias[1:]
+                alias = alias.replace('-', '_')
+                if alias in self.options:
+                    raise CommandException(f'Duplicate option alias "{alias}"')
+                self.options[alias] = name
+
+
 class Command:
     _name = ''
     _help = None
+    _schema = None
+    _inputs = []
+    _outputs = []
+    _depends = []
 
-    def __init__(self, app, command_line: str = ''):
-        self._fields = {}
-        self._argument_names = []
-        self._options = {}
+    def __init__(self, app, command_line: Union[str, List[str]] = ''):
+        schema = self._get_schema()
+        self._fields = schema.fields
+        self._argument_names = schema.argument_names
+        self._options = schema.options
         self.app = app
-        self._fields_update()
-        self.command_line = command_line
+        self.tokens = tokenize(command_line)
         self.extra_args = []
         self.init()
 
@@ -127,28 +211,21 @@ class Command:
     def context(self):
         return self.app.context
 
-    def _fields_update(self):
-        for name in dir(self):
-            field = getattr(self, name)
-            if isinstance(field, Field):
-                field.name = name
-                self._fields[name] = field
-        self._argument_names = sorted(
-            [key for key, val in self._fields.items() if not val.is_option],
-            key=lambda k: self._fields[k].pos,
-        )
-        self._options = {}
-        for name, field in self._fields.items():
-            if not field.is_option:
-                continue
-            self._options[name] = field
-            for alias in field.alias:
-                if alias.startswith('-'):
-                    alias = alias[2:] if alias.startswith('--') else alias[1:]
-                alias = alias.replace('-', '_')
-                if alias in self._options:
-                    raise CommandException(f'Duplicate option alias "{alias}"')
-                self._options[alias] = name
+    @property
+    def command_line(self) -> str:
+        return shlex.join(self.tokens)
+
+    @command_line.setter
+    def command_line(self, command_line: Union[str, List[str]]):
+        self.tokens = tokenize(command_line)
+
+    @classmethod
+    def _get_schema(cls) -> 'Schema':
+        schema = cls.__dict__.get('_schema')
+        if schema is None:
+            schema = Schema(cls)
+            cls._schema = schema
+        return schema
 
     def _fields_check(self):
         for name, field in self._fields.items():
@@ -158,9 +235,8 @@ class Command:
                     raise FieldException(field, 'is required')
                 setattr(self, name, field.default)
 
-    def _parse_command_line(self, command_line: str):
-        out.debug(f'Parse command line: {command_line}')
-        tokens = shlex.split(command_line)
+    def _parse_tokens(self, tokens: List[str]):
+        out.debug(lambda: f'Parse command line: {shlex.join(tokens)}')
         command_parts = self._name.split('.')
         argument_index = 0
         index = 0
@@ -181,7 +257,9 @@ class Command:
                     self.extra_args.append(token)
                     index += 1
 
-    def _handle_option(self, tokens: List[str], index: int) -> int:
+    def _read_option(
+        self, tokens: List[str], index: int
+    ) -> Tuple[Optional[dict], Optional[str], int]:
         token = tokens[index]
         option_str = token[2:] if token.startswith('--') else token[1:]
         name, value = (
@@ -189,29 +267,48 @@ class Command:
             if '=' in option_str
             else (option_str, None)
         )
-        name = name.replace('-', '_')
-        option_field = self._find_option(name)
+        option_field = self._find_option(name.replace('-', '_'))
         if not option_field:
-            self.extra_args.append(token)
-            return 1
-        consumed = 1
+            return None, None, 1
         if value is None and option_field['field'].type != bool:
             next_token = tokens[index + 1] if index + 1 < len(tokens) else None
-            if not next_token.startswith('-'):
-                value = next_token
-                consumed = 2
+            if next_token is not None and not next_token.startswith('-'):
+                return option_field, next_token, 2
+        return option_field, value, 1
+
+    def _local_tokens(self, tokens: List[str]) -> List[str]:
+        local = []
+        index = 0
+        while index < len(tokens):
+            consumed = 1
+            if tokens[index].startswith('-'):
+                option_field, _, consumed = self._read_option(tokens, index)
+                if option_field and option_field['is_global']:
+                    index += consumed
+                    continue
+            local += tokens[index : index + consumed]
+            index += consumed
+        return local
+
+    def _handle_option(self, tokens: List[str], index: int) -> int:
+        option_field, value, consumed = self._read_option(tokens, index)
+        if not option_field:
+            self.extra_args.append(tokens[index])
+            return 1
         parsed_value = option_field['field'].convert(value)
         option_name = option_field['name']
         if option_field['is_global']:
             self.app.set_option(option_name, parsed_value)
-            out.debug2(f'Global option "{option_name}" = {parsed_value}')
+            out.debug2('Global option "%s" = %s', option_name, parsed_value)
         else:
             setattr(self, option_name, parsed_value)
-            out.debug2(f'Option "{option_name}" = {parsed_value}')
+            out.debug2('Option "%s" = %s', option_name, parsed_value)
         return consumed
 
     def _find_option(self, name: str) -> dict:
         def _get_options(name: str) -> dict:
+            if isinstance(self._options.get(name), Field):
+                return self._options
             if name in self.app.options:
                 return self.app.options
             if name in self._options:
@@ -225,7 +322,7 @@ class Command:
         return {
             'field': options[field_name],
             'name': field_name,
-            'is_global': name in self.app.options,
+            'is_global': options is self.app.options,
         }
 
     def _handle_argument(
@@ -243,24 +340,59 @@ class Command:
                 list_values.append(token)
                 consumed += 1
             setattr(self, field_name, list_values)
-            out.debug2(f'Argument "{field_name}" = {list_values}')
+            out.debug2('Argument "%s" = %s', field_name, list_values)
             return consumed
         token = tokens[index]
         value = field.convert(token)
         setattr(self, field_name, value)
-        out.debug2(f'Argument "{field_name}" = {value}')
+        out.debug2('Argument "%s" = %s', field_name, value)
         return 1
 
-    def parse(self, command_line: str):
-        self._parse_command_line(command_line)
+    def parse(self, command_line: Union[str, List[str]]):
+        self._parse_tokens(tokenize(command_line))
         self._fields_check()
 
-    def launch(self, command_line: str):
-        self.command_line = command_line
-        out.debug(f'Launching command "{self._name}"')
-        self.parse(command_line)
-        out.debug(f'Running command "{self._name}"')
-        return self.fire()
+    def launch(
+        self, command_line: Union[str, List[str]], depends: bool = True
+    ):
+        self.tokens = tokenize(command_line)
+        out.debug('Launching command "%s"', self._name)
+        self.parse(self.tokens)
+        if depends and self._depends:
+            from clifire import scheduler
+
+            jobs = self.app.get_option('jobs', 1)
+            scheduler.Scheduler(self.app, jobs).run(self._depends)
+        if self._inputs and self._is_up_to_date():
+            out.info(f'Command "{self._name}" is up to date')
+            return None
+        out.debug('Running command "%s"', self._name)
+        res = self.fire()
+        if inspect.iscoroutine(res):
+            res = run_coroutine(res)
+        if self._inputs and (res is None or res is True or res == 0):
+            self._fingerprints().write(
+                self._name,
+                self._fingerprint_args(),
+                self._inputs,
+                self._outputs,
+            )
+        return res
+
+    def _fingerprints(self):
+        from clifire import fingerprint
+
+        folder = os.path.join(self.app.get_cache_folder(), 'fingerprints')
+        return fingerprint.FingerprintStore(folder)
+
+    def _fingerprint_args(self) -> dict:
+        values = {name: getattr(self, name) for name in self._fields}
+        return json.loads(json.dumps(values, default=str))
+
+    def _is_up_to_date(self) -> bool:
+        return self._fingerprints().is_up_to_date(
+            self._name, self._fingerprint_args(), self._inputs, self._outputs
+        )
 
     def init(self):
         pass
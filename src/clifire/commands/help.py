@@ -104,15 +104,12 @@ class CommandHelp(command.Command):
 
     def print_commands(self, cmd):
         groups = {}
-        group_name = (
-            '' if self.command == ['help'] else '.'.join(self.command + [''])
-        )
-        for cls in self.app.commands.values():
+        group = [] if self.command == ['help'] else self.command
+        group_name = '.'.join(group)
+        for cls in self.app.commands.children(group):
             name = cls._name
             if group_name:
-                if not name.startswith(group_name):
-                    continue
-                name = name[len(group_name) :]
+                name = name[len(group_name) + 1 :]
             parts = name.split('.')
             group = ' '.join(parts[:-1])
             groups.setdefault(group, []).append(
@@ -140,7 +137,7 @@ class CommandHelp(command.Command):
         self.print('')
 
     def fire(self):
-        cmd = self.app.get_command(' '.join(self.command))
+        cmd = self.app.get_command(self.command)
         self.print_description(cmd)
         self.print_usage(cmd)
         self.print_arguments(cmd)
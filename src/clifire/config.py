@@ -1,7 +1,6 @@
 import os
 from typing import Any, Dict, List
 
-import yaml
 from clifire import out
 
 
@@ -18,7 +17,7 @@ class Config:
             return None
         for file in files:
             config_file = path(file)
-            out.debug(f'Try read config file {config_file}')
+            out.debug('Try read config file %s', config_file)
             if os.path.exists(config_file):
                 out.debug2('Exists, reading...')
                 config = Config(config_file=config_file, **kwargs)
@@ -97,12 +96,16 @@ class Config:
     def read(self):
         if not os.path.exists(self._config_file):
             return False
+        import yaml
+
         with open(self._config_file, encoding='utf-8') as file:
             self.__dict__.update(self._safe_dict(yaml.safe_load(file) or {}))
         return True
 
     def write(self):
-        out.debug(f'Write config file {self._config_file}')
+        import yaml
+
+        out.debug('Write config file %s', self._config_file)
         config_dir = os.path.dirname(self._config_file)
         if not os.path.exists(config_dir):
             os.makedirs(config_dir)
@@ -0,0 +1,327 @@
+import array
+import hashlib
+import importlib
+import json
+import os
+import select
+import signal
+import socket
+import stat
+import struct
+import sys
+import tempfile
+from typing import Dict, List, Optional, Tuple
+
+from clifire import out
+
+HEADER = struct.Struct('!Q')
+CODE = struct.Struct('!i')
+STD_FDS = (0, 1, 2)
+REAP_INTERVAL = 1.0
+
+
+PEERCRED = struct.Struct('3i')
+
+
+def socket_folder() -> str:
+    folder = os.environ.get('XDG_RUNTIME_DIR') or tempfile.gettempdir()
+    return os.path.join(folder, f'clifire-{os.getuid()}')
+
+
+def socket_path(fire_path: str) -> str:
+    root = os.path.dirname(os.path.abspath(fire_path))
+    digest = hashlib.sha1(root.encode()).hexdigest()[:16]
+    return os.path.join(socket_folder(), f'{digest}.sock')
+
+
+def is_private_folder(folder: str) -> bool:
+    try:
+        info = os.lstat(folder)
+    except OSError:
+        return False
+    return (
+        stat.S_ISDIR(info.st_mode)
+        and info.st_uid == os.getuid()
+        and not info.st_mode & 0o077
+    )
+
+
+def is_trusted(path: str) -> bool:
+    if not is_private_folder(os.path.dirname(path)):
+        return False
+    try:
+        info = os.lstat(path)
+    except OSError:
+        return False
+    return stat.S_ISSOCK(info.st_mode) and info.st_uid == os.getuid()
+
+
+def peer_uid(sock: socket.socket) -> Optional[int]:
+    if not hasattr(socket, 'SO_PEERCRED'):
+        return None
+    creds = sock.getsockopt(
+        socket.SOL_SOCKET, socket.SO_PEERCRED, PEERCRED.size
+    )
+    return PEERCRED.unpack(creds)[1]
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    data = b''
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            break
+        data += chunk
+    return data
+
+
+def send_request(sock: socket.socket, request: dict, fds: Tuple[int]):
+    payload = json.dumps(request).encode('utf8')
+    sock.sendmsg(
+        [HEADER.pack(len(payload))],
+        [(socket.SOL_SOCKET, socket.SCM_RIGHTS, array.array('i', fds))],
+    )
+    sock.sendall(payload)
+
+
+def recv_request(sock: socket.socket) -> Tuple[dict, List[int]]:
+    fds = array.array('i')
+    data, ancdata, _, _ = sock.recvmsg(
+        HEADER.size, socket.CMSG_LEN(len(STD_FDS) * fds.itemsize)
+    )
+    for level, kind, cmsg_data in ancdata:
+        if level == socket.SOL_SOCKET and kind == socket.SCM_RIGHTS:
+            size = len(cmsg_data) - len(cmsg_data) % fds.itemsize
+            fds.frombytes(cmsg_data[:size])
+    data += _recv_exact(sock, HEADER.size - len(data))
+    payload = _recv_exact(sock, HEADER.unpack(data)[0])
+    return json.loads(payload.decode('utf8')), list(fds)
+
+
+def forward(
+    fire_path: str, argv: List[str], fds: Tuple[int] = STD_FDS
+) -> Optional[int]:
+    path = socket_path(fire_path)
+    if not os.path.exists(path):
+        return None
+    if not is_trusted(path):
+        out.warn(f'Ignoring the daemon socket {path}, it is not private')
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path)
+    except OSError:
+        sock.close()
+        return None
+    uid = peer_uid(sock)
+    if uid is not None and uid != os.getuid():
+        sock.close()
+        out.warn(f'Ignoring the daemon socket {path}, it is not private')
+        return None
+    with sock:
+        request = {
+            'argv': argv,
+            'cwd': os.getcwd(),
+            'env': dict(os.environ),
+        }
+        send_request(sock, request, fds)
+        data = b''
+        while len(data) < CODE.size * 2:
+            try:
+                chunk = sock.recv(CODE.size * 2 - len(data))
+            except KeyboardInterrupt:
+                pid = 0
+                if len(data) >= CODE.size:
+                    pid = CODE.unpack(data[: CODE.size])[0]
+                if not pid:
+                    return 130
+                os.kill(pid, signal.SIGINT)
+                continue
+            if not chunk:
+                return 1
+            data += chunk
+    return CODE.unpack(data[CODE.size :])[0]
+
+
+class Daemon:
+    preload_modules = [
+        'rich.live',
+        'rich.markup',
+        'rich.prompt',
+        'rich.table',
+        'rich.traceback',
+    ]
+
+    def __init__(self, app, fire_path: str, fork: bool = False):
+        self.app = app
+        self.fire_path = os.path.abspath(fire_path)
+        self.path = socket_path(self.fire_path)
+        self.fork = fork
+        self.files = {}
+        self.children = set()
+        self._sock = None
+
+    def preload(self):
+        out.get_console()
+        for module in self.preload_modules:
+            importlib.import_module(module)
+
+    def scan(self) -> Dict[str, int]:
+        if not os.path.isdir(self.fire_path):
+            return {self.fire_path: os.stat(self.fire_path).st_mtime_ns}
+        stats = {}
+        for file in sorted(os.listdir(self.fire_path)):
+            if file.endswith('.py'):
+                filename = os.path.join(self.fire_path, file)
+                stats[filename] = os.stat(filename).st_mtime_ns
+        return stats
+
+    def reload(self):
+        from clifire import main
+
+        stats = self.scan()
+        for filename in list(self.files):
+            if stats.get(filename) == self.files[filename][0]:
+                continue
+            out.debug(lambda: f'Unload {os.path.relpath(filename)}')
+            for name in self.files.pop(filename)[1]:
+                self.app.commands.pop(name, None)
+        for filename, mtime in stats.items():
+            if filename in self.files:
+                continue
+            try:
+                commands = main.load_file_commands(filename)
+            except Exception as e:
+                out.error(f'Error loading {os.path.relpath(filename)}: {e}')
+                commands = []
+            self.files[filename] = (mtime, [cls._name for cls in commands])
+
+    def serve(self):
+        self.reload()
+        if self.fork:
+            self.preload()
+        folder = os.path.dirname(self.path)
+        os.makedirs(folder, mode=0o700, exist_ok=True)
+        if not is_private_folder(folder):
+            out.critical(
+                f'The folder {folder} must be owned by the current user '
+                'and not accessible by other users'
+            )
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        sock = self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        previous_handler = signal.signal(
+            signal.SIGTERM, signal.default_int_handler
+        )
+        try:
+            sock.bind(self.path)
+            os.chmod(self.path, 0o600)
+            sock.listen()
+            mode = ' (fork server)' if self.fork else ''
+            out.info(f'Daemon listening on {self.path}{mode}')
+            while True:
+                ready, _, _ = select.select([sock], [], [], REAP_INTERVAL)
+                if ready:
+                    conn, _ = sock.accept()
+                    with conn:
+                        self.handle(conn)
+                self.reap()
+        except KeyboardInterrupt:
+            out.info('Daemon stopped')
+        finally:
+            signal.signal(signal.SIGTERM, previous_handler)
+            sock.close()
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+    def reap(self):
+        for pid in list(self.children):
+            try:
+                if not os.waitpid(pid, os.WNOHANG)[0]:
+                    continue
+            except ChildProcessError:
+                pass
+            self.children.discard(pid)
+
+    def handle(self, conn: socket.socket):
+        request, fds = recv_request(conn)
+        try:
+            if self.fork:
+                self.handle_fork(conn, request, fds)
+                return
+            self.send_code(conn, 0)
+            code = self.run(request, fds)
+        finally:
+            for fd in fds:
+                os.close(fd)
+        self.send_code(conn, code)
+
+    def handle_fork(self, conn: socket.socket, request: dict, fds: List[int]):
+        self.reload()
+        sys.stdout.flush()
+        sys.stderr.flush()
+        ready, sent = os.pipe()
+        pid = os.fork()
+        if pid:
+            self.children.add(pid)
+            os.close(ready)
+            self.send_code(conn, pid)
+            os.close(sent)
+            return
+        code = 1
+        try:
+            os.close(sent)
+            os.read(ready, 1)
+            os.close(ready)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            self._sock.close()
+            for fd, std_fd in zip(fds, STD_FDS):
+                os.dup2(fd, std_fd)
+            os.chdir(request['cwd'])
+            os.environ.clear()
+            os.environ.update(request['env'])
+            sys.argv = [sys.argv[0]] + request['argv']
+            out.reset_console()
+            code = self.app.fire_many([request['argv']])[0]
+        except KeyboardInterrupt:
+            code = 130
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            self.send_code(conn, code)
+            os._exit(code)
+
+    def send_code(self, conn: socket.socket, code: int):
+        try:
+            conn.sendall(CODE.pack(code))
+        except OSError:
+            out.debug('Client disconnected')
+
+    def run(self, request: dict, fds: List[int]) -> int:
+        saved_fds = [os.dup(fd) for fd in STD_FDS]
+        saved_cwd = os.getcwd()
+        saved_env = dict(os.environ)
+        saved_argv = sys.argv
+        sys.stdout.flush()
+        sys.stderr.flush()
+        try:
+            for fd, std_fd in zip(fds, STD_FDS):
+                os.dup2(fd, std_fd)
+            os.chdir(request['cwd'])
+            os.environ.clear()
+            os.environ.update(request['env'])
+            sys.argv = [sys.argv[0]] + request['argv']
+            out.reset_console()
+            self.reload()
+            return self.app.fire_many([request['argv']])[0]
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            for fd, std_fd in zip(saved_fds, STD_FDS):
+                os.dup2(fd, std_fd)
+                os.close(fd)
+            out.reset_console()
+            sys.argv = saved_argv
+            os.environ.clear()
+            os.environ.update(saved_env)
+            os.chdir(saved_cwd)
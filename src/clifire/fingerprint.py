@@ -0,0 +1,114 @@
+import glob
+import hashlib
+import json
+import os
+from typing import Dict, List, Optional
+
+from clifire import out
+
+
+def file_hash(filename: str) -> str:
+    digest = hashlib.sha256()
+    with open(filename, 'rb') as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def expand(patterns: List[str]) -> Optional[List[str]]:
+    files = set()
+    for pattern in patterns:
+        matches = glob.glob(pattern, recursive=True)
+        if not matches:
+            return None
+        for match in matches:
+            if os.path.isdir(match):
+                for root, _, names in os.walk(match):
+                    files.update(os.path.join(root, name) for name in names)
+            else:
+                files.add(match)
+    return sorted(files)
+
+
+class FingerprintStore:
+    def __init__(self, folder: str):
+        self.folder = folder
+
+    def filename(self, name: str) -> str:
+        return os.path.join(self.folder, f'{name}.json')
+
+    def read(self, name: str) -> dict:
+        try:
+            with open(self.filename(name), encoding='utf-8') as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {}
+
+    def scan(
+        self, inputs: List[str], outputs: List[str]
+    ) -> Optional[Dict[str, List]]:
+        files = expand(inputs)
+        if files is None:
+            return None
+        if outputs:
+            output_files = expand(outputs)
+            if output_files is None:
+                return None
+            files += output_files
+        stats = {}
+        for filename in files:
+            stat = os.stat(filename)
+            stats[filename] = [stat.st_mtime_ns, stat.st_size]
+        return stats
+
+    def is_up_to_date(
+        self, name: str, args: dict, inputs: List[str], outputs: List[str]
+    ) -> bool:
+        data = self.read(name)
+        if not data or data.get('args') != args:
+            return False
+        stats = self.scan(inputs, outputs)
+        if stats is None or sorted(stats) != sorted(data['files']):
+            return False
+        for filename, stat in stats.items():
+            mtime, size, digest = data['files'][filename]
+            if stat == [mtime, size]:
+                continue
+            if stat[1] != size or file_hash(filename) != digest:
+                out.debug2('Fingerprint: %s changed', filename)
+                return False
+        return True
+
+    def write(
+        self, name: str, args: dict, inputs: List[str], outputs: List[str]
+    ) -> bool:
+        stats = self.scan(inputs, outputs)
+        if stats is None:
+            out.debug2('Fingerprint: missing files for "%s"', name)
+            return False
+        previous = self.read(name).get('files', {})
+        files = {}
+        for filename, stat in stats.items():
+            entry = previous.get(filename)
+            if entry and entry[:2] == stat:
+                files[filename] = entry
+            else:
+                files[filename] = stat + [file_hash(filename)]
+        filename = self.filename(name)
+        tmp_filename = f'{filename}.{os.getpid()}.tmp'
+        try:
+            os.makedirs(self.folder, exist_ok=True)
+            with open(tmp_filename, 'w', encoding='utf-8') as file:
+                json.dump({'args': args, 'files': files}, file)
+            os.replace(tmp_filename, filename)
+        except OSError:
+            out.debug2('Fingerprint %s can not be written', filename)
+            return False
+        return True
+
+    def clear(self, name: str) -> bool:
+        try:
+            os.remove(self.filename(name))
+        except OSError:
+            return False
+        return True
@@ -0,0 +1,90 @@
+from collections.abc import MutableMapping
+from typing import Iterator, List, Optional, Type
+
+
+class Node:
+    __slots__ = ('children', 'command')
+
+    def __init__(self):
+        self.children = {}
+        self.command = None
+
+
+class CommandIndex(MutableMapping):
+    def __init__(self, commands: dict = None):
+        self._commands = {}
+        self._root = Node()
+        if commands:
+            self.update(commands)
+
+    def __getitem__(self, name: str):
+        return self._commands[name]
+
+    def __setitem__(self, name: str, cls: Type):
+        node = self._root
+        for part in name.split('.'):
+            node = node.children.setdefault(part, Node())
+        node.command = cls
+        self._commands[name] = cls
+
+    def __delitem__(self, name: str):
+        del self._commands[name]
+        path = [self._root]
+        parts = name.split('.')
+        for part in parts:
+            path.append(path[-1].children[part])
+        path[-1].command = None
+        for part, node in zip(reversed(parts), reversed(path[:-1])):
+            child = node.children[part]
+            if child.children or child.command is not None:
+                break
+            del node.children[part]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._commands)
+
+    def __len__(self) -> int:
+        return len(self._commands)
+
+    def __repr__(self) -> str:
+        return repr(self._commands)
+
+    def _walk(self, args: List[str]) -> Iterator[Node]:
+        node = self._root
+        for arg in args:
+            for part in arg.split('.'):
+                node = node.children.get(part)
+                if node is None:
+                    return
+            yield node
+
+    def node(self, args: List[str]) -> Optional[Node]:
+        node = self._root
+        for arg in args:
+            for part in arg.split('.'):
+                node = node.children.get(part)
+                if node is None:
+                    return None
+        return node
+
+    def longest_match(self, args: List[str]) -> Optional[Type]:
+        cls = None
+        for node in self._walk(args):
+            if node.command is not None:
+                cls = node.command
+        return cls
+
+    def is_group(self, args: List[str]) -> bool:
+        node = self.node(args)
+        return bool(node and node.children)
+
+    def children(self, args: List[str]) -> Iterator[Type]:
+        node = self.node(args)
+        if node is None:
+            return
+        nodes = list(node.children.values())
+        while nodes:
+            node = nodes.pop()
+            if node.command is not None:
+                yield node.command
+            nodes.extend(node.children.values())
@@ -1,7 +1,13 @@
 import importlib.util
 import os
+import shlex
+import sys
+from typing import TYPE_CHECKING, List, Optional, Type
 
-from clifire import application, out
+from clifire import daemon, out
+
+if TYPE_CHECKING:
+    from clifire import application, command
 
 
 def load(path):
@@ -16,13 +22,26 @@ def load(path):
 
 
 def load_folder(path):
-    for file in os.listdir(path):
-        if file.endswith('.py'):
-            load_file(os.path.join(path, file))
+    from clifire import application, manifest
+
+    app = application.App.current_app
+    fire_manifest = manifest.Manifest(path)
+    if fire_manifest.is_valid():
+        out.debug2('Using manifest %s', fire_manifest.filename)
+        fire_manifest.register(app)
+        return
+    for file in fire_manifest.scan():
+        filename = os.path.join(path, file)
+        options = set(app.options)
+        commands = load_file_commands(filename)
+        fire_manifest.add(
+            filename, commands, eager=set(app.options) != options
+        )
+    fire_manifest.write()
 
 
 def load_file(filename):
-    out.debug2(f'Loading {os.path.relpath(filename)}')
+    out.debug2(lambda: f'Loading {os.path.relpath(filename)}')
     module_name = os.path.basename(filename)[:-3]
     spec = importlib.util.spec_from_file_location(module_name, filename)
     module = importlib.util.module_from_spec(spec)
@@ -30,31 +49,145 @@ def load_file(filename):
     return module
 
 
-def main(command_line: str = None):
-    app = application.App(name='CliFire', version='0.1.13')
-    current_dir = os.getcwd()
-    out.debug(f'Search commands in {current_dir} folder and parents')
-    loaded = False
+def load_file_commands(filename) -> List[Type['command.Command']]:
+    from clifire import application
+
+    app = application.App.current_app
+    commands = dict(app.commands)
+    load_file(filename)
+    return [
+        cls
+        for name, cls in app.commands.items()
+        if commands.get(name) is not cls
+    ]
+
+
+def find_fire(path: str) -> Optional[str]:
+    current_dir = path
     while True:
-        fire_folder = os.path.join(current_dir, 'fire')
-        if load(fire_folder):
-            loaded = True
-            break
-        fire_file = os.path.join(current_dir, 'fire.py')
-        if load(fire_file):
-            loaded = True
-            break
+        for name in ('fire', 'fire.py'):
+            fire_path = os.path.join(current_dir, name)
+            if os.path.exists(fire_path):
+                return fire_path
         parent_dir = os.path.dirname(current_dir)
         if parent_dir == current_dir:
-            break
+            return None
         current_dir = parent_dir
-    if not loaded:
+
+
+def fire_batch(app: 'application.App', filename: str):
+    if filename != '-' and not os.path.isfile(filename):
+        out.critical(f'Batch file "{filename}" not found.')
+    lines = []
+
+    def command_lines(file):
+        for lineno, line in enumerate(file, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            lines.append((lineno, line))
+            yield line
+
+    if filename == '-':
+        codes = app.fire_many(command_lines(sys.stdin))
+    else:
+        with open(filename, encoding='utf-8') as file:
+            codes = app.fire_many(command_lines(file))
+    failed = 0
+    for (lineno, line), code in zip(lines, codes):
+        if code:
+            failed += 1
+            out.error(f'Line {lineno} exited with code {code}: {line}')
+    if failed:
+        out.critical(f'{failed} of {len(codes)} command lines failed.')
+    out.success(f'{len(codes)} command lines executed.')
+
+
+def forward(argv: List[str]) -> Optional[int]:
+    if '--daemon' in argv:
+        return None
+    if any(arg == '--batch' or arg.startswith('--batch=') for arg in argv):
+        return None
+    fire_path = find_fire(os.getcwd())
+    if fire_path is None:
+        return None
+    return daemon.forward(fire_path, argv)
+
+
+def main(command_line: str = None):
+    if command_line is None:
+        code = forward(sys.argv[1:])
+        if code is not None:
+            sys.exit(code)
+    from clifire import application, cache, command
+
+    app = application.App(name='CliFire', version='0.1.13')
+    app.add_option(
+        'batch',
+        command.Field(
+            help='Run each line of FILE (or stdin with -) as a command',
+            default='',
+        ),
+    )
+    app.add_option(
+        'daemon',
+        command.Field(
+            help='Keep the commands loaded and serve them on a Unix socket',
+            default=False,
+        ),
+    )
+    app.add_option(
+        'fork',
+        command.Field(
+            help='With --daemon, run each request in a forked process',
+            default=False,
+        ),
+    )
+    app.add_option(
+        'each',
+        command.Field(
+            help='Run the command once for each line of FILE',
+            default='',
+        ),
+    )
+    app.add_option(
+        'jobs',
+        command.Field(
+            help='Number of commands run in parallel',
+            default=1,
+        ),
+    )
+    argv = sys.argv[1:] if command_line is None else shlex.split(command_line)
+    current_dir = os.getcwd()
+    out.debug('Search commands in %s folder and parents', current_dir)
+    fire_path = find_fire(current_dir)
+    if fire_path is None:
         out.warn(
             'The file fire.py or folder fire is not in this directory or its '
             'parents'
         )
         out.critical('Fire not found!')
-    app.fire(command_line)
+    app.cache_folder = os.path.join(
+        os.path.dirname(os.path.abspath(fire_path)), cache.CACHE_FOLDER
+    )
+    serve = '--daemon' in argv
+    if not serve or app._after_command(argv, 'daemon'):
+        load(fire_path)
+        serve = serve and not app._owns_option(argv, 'daemon')
+    if serve:
+        fork = '--fork' in argv and not app._owns_option(argv, 'fork')
+        return daemon.Daemon(app, fire_path, fork=fork).serve()
+    batch = None
+    if not app._owns_option(argv, 'batch'):
+        batch = command.pop_option(argv, '--batch')
+    if batch is not None:
+        with out.finishing():
+            app._setup_output(argv)
+            app._check_output('batch')
+            return fire_batch(app, batch)
+    if command_line is None:
+        out.debug('Sys argv value: %s', sys.argv)
+    app.fire_argv(argv)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,167 @@
+import json
+import os
+import threading
+from typing import Dict, List, Type, Union
+
+from clifire import command, out
+
+MANIFEST_FILE = '.fire-manifest.json'
+MANIFEST_VERSION = 3
+FIELD_TYPES = {t.__name__: t for t in (str, int, float, bool, list)}
+_load_locks = {}
+_load_locks_lock = threading.Lock()
+
+
+class LazyCommand(command.Command):
+    _source = ''
+
+    def launch(
+        self, command_line: Union[str, List[str]], depends: bool = True
+    ):
+        from clifire import main
+
+        with _load_locks_lock:
+            lock = _load_locks.setdefault(self._source, threading.Lock())
+        with lock:
+            cls = self.app.commands.get(self._name)
+            if cls is None or issubclass(cls, LazyCommand):
+                main.load_file(self._source)
+                cls = self.app.commands.get(self._name)
+        if cls is None or issubclass(cls, LazyCommand):
+            raise command.CommandException(
+                f'The command "{self._name}" is not defined in '
+                f'{os.path.relpath(self._source)}'
+            )
+        cmd = cls(self.app, command_line)
+        return cmd.launch(command_line, depends=depends)
+
+
+class Manifest:
+    def __init__(self, folder: str):
+        self.folder = folder
+        self.filename = os.path.join(os.path.dirname(folder), MANIFEST_FILE)
+        self.files = {}
+
+    def scan(self) -> Dict[str, List[int]]:
+        stats = {}
+        for file in sorted(os.listdir(self.folder)):
+            if not file.endswith('.py'):
+                continue
+            stat = os.stat(os.path.join(self.folder, file))
+            stats[file] = [stat.st_mtime_ns, stat.st_size]
+        return stats
+
+    def read(self) -> bool:
+        if not os.path.exists(self.filename):
+            return False
+        try:
+            with open(self.filename, encoding='utf-8') as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            out.debug2('Manifest %s can not be read', self.filename)
+            return False
+        if data.get('version') != MANIFEST_VERSION:
+            return False
+        self.files = data.get('files', {})
+        return True
+
+    def is_valid(self) -> bool:
+        if not self.read():
+            return False
+        stats = {
+            file: [entry['mtime'], entry['size']]
+            for file, entry in self.files.items()
+        }
+        return stats == self.scan()
+
+    def add(
+        self,
+        filename: str,
+        commands: List[Type[command.Command]],
+        eager: bool = False,
+    ):
+        stat = os.stat(filename)
+        try:
+            commands = [self.dump_command(cls) for cls in commands]
+        except command.CommandException:
+            commands, eager = [], True
+        self.files[os.path.basename(filename)] = {
+            'mtime': stat.st_mtime_ns,
+            'size': stat.st_size,
+            'eager': eager,
+            'commands': commands,
+        }
+
+    def write(self) -> bool:
+        data = {'version': MANIFEST_VERSION, 'files': self.files}
+        tmp_filename = f'{self.filename}.{os.getpid()}.tmp'
+        try:
+            with open(tmp_filename, 'w', encoding='utf-8') as file:
+                json.dump(data, file, indent=1)
+            os.replace(tmp_filename, self.filename)
+        except OSError:
+            out.debug2('Manifest %s can not be written', self.filename)
+            return False
+        out.debug2('Manifest written in %s', self.filename)
+        return True
+
+    def dump_command(self, cls: Type[command.Command]) -> dict:
+        lines = (cls._help or cls.__doc__ or '').strip().splitlines()
+        fields = []
+        for name, field in cls._get_schema().fields.items():
+            type_name = getattr(field.type, '__name__', None)
+            if FIELD_TYPES.get(type_name) is not field.type:
+                type_name = None
+            default = field.default
+            try:
+                json.dumps(default)
+            except (TypeError, ValueError):
+                default = None
+            fields.append(
+                {
+                    'name': name,
+                    'pos': field.pos,
+                    'help': field.help,
+                    'alias': field.alias,
+                    'required': field.is_required,
+                    'type': type_name,
+                    'default': default,
+                }
+            )
+        return {
+            'name': cls._name,
+            'help': lines[0] if lines else '',
+            'fields': fields,
+            'depends': cls._depends,
+        }
+
+    def load_command(self, filename: str, data: dict):
+        attrs = {
+            '_name': data['name'],
+            '_help': data['help'],
+            '_source': filename,
+            '_depends': data['depends'],
+        }
+        for field in data['fields']:
+            default = field['default']
+            if default is None and not field['required']:
+                default = ''
+            attrs[field['name']] = command.Field(
+                pos=field['pos'],
+                help=field['help'],
+                default=default,
+                alias=field['alias'],
+                force_type=FIELD_TYPES.get(field['type']),
+            )
+        return type('LazyCommand', (LazyCommand,), attrs)
+
+    def register(self, app):
+        from clifire import main
+
+        for file, entry in self.files.items():
+            filename = os.path.join(self.folder, file)
+            if entry['eager']:
+                main.load_file(filename)
+                continue
+            for data in entry['commands']:
+                app.add_command(self.load_command(filename, data))
@@ -1,20 +1,19 @@
 import atexit
+import contextlib
+import contextvars
+import io
+import itertools
+import json
+import os
 import re
 import sys
 import threading
 import time
-from typing import Any, Dict, List, Optional, Tuple, Union
-
-from rich import traceback
-from rich.console import Console
-from rich.live import Live
-from rich.prompt import Prompt
-from rich.table import Table
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
 _traceback_handler = None
 
-CONSOLE = Console()
-CONSOLE_WIDTH = CONSOLE.width
+CONSOLE_WIDTH = None
 
 COLOR_NORMAL = 'white'
 COLOR_DEBUG = 'grey50'
@@ -29,27 +28,126 @@ ICON_SUCCESS = '✓'
 ICON_ERROR = '✗'
 ICON_WARN = '▲'
 
+ANSI = None
+PLAIN = False
+OUTPUT = 'text'
+OUTPUT_FORMATS = ('text', 'json', 'ndjson')
+_records = []
+
+VERBOSE = 1
+_verbose_app = None
+_application = None
+
+
+def __getattr__(name: str):
+    if name == 'CONSOLE':
+        return get_console()
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+_context_console = contextvars.ContextVar('console', default=None)
+_context_records = contextvars.ContextVar('records', default=None)
+_context_verbose = contextvars.ContextVar('verbose', default=None)
+
+
+@contextlib.contextmanager
+def use_console(console):
+    token = _context_console.set(console)
+    records_token = _context_records.set([])
+    try:
+        yield console
+    finally:
+        _context_records.reset(records_token)
+        _context_console.reset(token)
+
+
+def capture_console(width: int = 10000):
+    from rich.console import Console
+
+    return Console(
+        file=io.StringIO(),
+        width=width,
+        no_color=True,
+        highlight=False,
+        soft_wrap=False,
+        color_system=None,
+    )
+
+
+def get_console():
+    global CONSOLE, CONSOLE_WIDTH
+    console = _context_console.get()
+    if console is not None:
+        return console
+    console = globals().get('CONSOLE')
+    if console is None:
+        from rich.console import Console
+
+        console = Console()
+        CONSOLE_WIDTH = console.width
+        CONSOLE = console
+        if ANSI is not None:
+            _setup_console(console)
+    return console
+
+
+def reset_console() -> None:
+    global CONSOLE
+    CONSOLE = None
+
+
+def _setup_console(console) -> None:
+    if ANSI:
+        console.no_color = False
+        console.highlight = True
+        console.soft_wrap = True
+        console.width = CONSOLE_WIDTH
+    else:
+        console.no_color = True
+        console.highlight = False
+        console.soft_wrap = False
+        console.width = 10000
+
+
+def use_plain(ansi: bool) -> bool:
+    if os.environ.get('FORCE_COLOR'):
+        return False
+    if not ansi:
+        return True
+    isatty = getattr(sys.stdout, 'isatty', None)
+    return not (isatty and isatty())
+
+
+def flush() -> None:
+    console = globals().get('CONSOLE')
+    if console is not None:
+        console.file.flush()
+    sys.stdout.flush()
+
 
 def setup(
-    ansi: bool = True, show_icons: bool = None, verbose: bool = False
+    ansi: bool = True,
+    show_icons: bool = None,
+    verbose: bool = False,
+    output: str = 'text',
 ) -> None:
-    global ICON_SHOW, CONSOLE, CONSOLE_WIDTH, _traceback_handler
+    global ICON_SHOW, ANSI, PLAIN, OUTPUT, _traceback_handler
     if show_icons is not None:
         ICON_SHOW = show_icons
+    ANSI = ansi
+    PLAIN = use_plain(ansi)
+    OUTPUT = output
+    _records.clear()
+    if globals().get('CONSOLE') is not None:
+        _setup_console(CONSOLE)
     if ansi:
-        CONSOLE.no_color = False
-        CONSOLE.highlight = True
-        CONSOLE.soft_wrap = True
-        CONSOLE.width = CONSOLE_WIDTH
         debug('Console output setup with ANSI')
     else:
-        CONSOLE.no_color = True
-        CONSOLE.highlight = False
-        CONSOLE.soft_wrap = False
-        CONSOLE.width = 10000
         debug('Console output setup with no ANSI')
     if verbose:
         if _traceback_handler is None or sys.excepthook == sys.__excepthook__:
+            from rich import traceback
+
             _traceback_handler = traceback.install(
                 show_locals=True,
                 theme='monokai',
@@ -69,6 +167,7 @@ class LiveText:
         self._running = False
         self._thread = None
         self._text = ''
+        self._level = 'info'
         atexit.register(self.cancel)
         self.elapsed_time = 0
         self.refresh_per_second = refresh_per_second
@@ -80,8 +179,10 @@ class LiveText:
         return self._running
 
     def _start(self):
+        from rich.live import Live
+
         with Live(
-            console=CONSOLE,
+            console=get_console(),
             refresh_per_second=self.refresh_per_second,
         ) as live:
             self._live = live
@@ -99,6 +200,8 @@ class LiveText:
 
     def start(self):
         self._running = True
+        if OUTPUT != 'text':
+            return
         if self._thread and self._thread.is_alive():
             return
         self._thread = threading.Thread(target=self._start, daemon=True)
@@ -109,8 +212,10 @@ class LiveText:
         self.stop()
 
     def stop(self):
-        if self._text != '':
-            CONSOLE.print(self._text)
+        if self._text != '' and OUTPUT != 'text':
+            record(self._level, msg=_plain_text(self._text))
+        elif self._text != '':
+            get_console().print(self._text)
         self._running = False
         if self._thread and self._thread.is_alive():
             if self._live:
@@ -122,11 +227,13 @@ class LiveText:
                 self._live.stop()
 
     def info(self, text: str, end=False):
+        self._level = 'info'
         self._text = text_color(text, color=COLOR_INFO)
         if end:
             self.stop()
 
     def warn(self, text: str, end=False, icon: bool = None):
+        self._level = 'warn'
         self._text = text_color(
             text, color=COLOR_WARN, icon=ICON_WARN, show_icon=icon
         )
@@ -134,6 +241,7 @@ class LiveText:
             self.stop()
 
     def success(self, text: str, end=True, icon: bool = None):
+        self._level = 'success'
         self._text = text_color(
             text, color=COLOR_SUCCESS, icon=ICON_SUCCESS, show_icon=icon
         )
@@ -141,6 +249,7 @@ class LiveText:
             self.stop()
 
     def error(self, text: str, end=True, icon: bool = None):
+        self._level = 'error'
         self._text = text_color(
             text, color=COLOR_ERROR, icon=ICON_ERROR, show_icon=icon
         )
@@ -163,26 +272,115 @@ def live(text: str = '', refresh_per_second: int = 10):
     return _current_live
 
 
+def _is_numeric(column) -> bool:
+    dtype = getattr(column, 'dtype', None)
+    if dtype is not None:
+        return dtype.kind in 'iuf'
+    return bool(column) and all(
+        isinstance(value, (int, float)) and not isinstance(value, bool)
+        for value in column
+    )
+
+
+def _column_values(column) -> List[str]:
+    if hasattr(column, 'tolist'):
+        column = column.tolist()
+    return list(map(str, column))
+
+
+def _array_columns(data, headers: Optional[List[str]] = None) -> dict:
+    array = data.__array__()
+    names = array.dtype.names
+    if names:
+        return {name: array[name] for name in names}
+    columns = list(array.T) if len(array.shape) > 1 else [array]
+    headers = headers or [f'column_{i}' for i in range(len(columns))]
+    return dict(zip(headers, columns))
+
+
+def _table_rows(data, headers: Optional[List[str]] = None) -> Iterator[dict]:
+    if hasattr(data, '__array__'):
+        data = _array_columns(data, headers)
+    if isinstance(data, dict):
+        columns = [
+            column.tolist() if hasattr(column, 'tolist') else column
+            for column in data.values()
+        ]
+        for values in zip(*columns):
+            yield dict(zip(data, values))
+    elif headers is not None:
+        for row in data:
+            yield dict(zip(headers, row))
+    else:
+        yield from data
+
+
+def _table_columns(data, headers: Optional[List[str]] = None) -> List[Tuple]:
+    if hasattr(data, '__array__'):
+        data = _array_columns(data, headers)
+    if isinstance(data, dict):
+        return [
+            (key, _column_values(column), _is_numeric(column))
+            for key, column in data.items()
+        ]
+    if headers is not None:
+        columns = list(zip(*data)) or [[] for _ in headers]
+        return [
+            (key, _column_values(column), _is_numeric(column))
+            for key, column in zip(headers, columns)
+        ]
+    keys = list(data[0].keys())
+    return [
+        (
+            key,
+            _column_values([row.get(key, '') for row in data]),
+            isinstance(data[0][key], (int, float)),
+        )
+        for key in keys
+    ]
+
+
 def table(
-    data: List[Dict[str, Any]],
+    data: Union[List[Dict[str, Any]], Dict[str, Any], Iterable],
     title: str = '',
     border: bool = True,
     show_header: bool = True,
     style_cols: Optional[Union[Dict[str, str], str]] = None,
     padding: Optional[Tuple] = None,
     style: Optional[str] = None,
+    headers: Optional[List[str]] = None,
 ):
-    if not data:
+    if OUTPUT != 'text':
+        for row in _table_rows(data, headers):
+            record('row', table=title, data=row)
         return
-    keys = list(data[0].keys())
+    is_columnar = isinstance(data, dict) or hasattr(data, '__array__')
+    if not is_columnar and not isinstance(data, (list, tuple)):
+        if headers is not None:
+            data = (dict(zip(headers, row)) for row in data)
+        return table_stream(
+            data,
+            title=title,
+            border=border,
+            show_header=show_header,
+            style_cols=style_cols,
+            padding=padding,
+            style=style,
+        )
+    if not is_columnar and not data:
+        return
+    columns = _table_columns(data, headers)
+    if not columns or not columns[0][1]:
+        return
+    from rich.table import Table
+
     tbl = Table(title=title, show_header=show_header, style=style)
     if not border:
         tbl.box = None
         tbl.padding = (0, 2)
     if padding is not None:
         tbl.padding = padding
-    for key in keys:
-        justify = 'right' if isinstance(data[0][key], (int, float)) else 'left'
+    for key, _, is_numeric in columns:
         _style_col = None
         if isinstance(style_cols, dict):
             _style_col = style_cols.get(key, None)
@@ -190,12 +388,126 @@ def table(
             _style_col = style_cols
         tbl.add_column(
             key.replace('_', ' ').capitalize(),
-            justify=justify,
+            justify='right' if is_numeric else 'left',
             style=_style_col,
         )
-    for row in data:
-        tbl.add_row(*(str(row.get(key, '')) for key in keys))
-    CONSOLE.print(tbl)
+    for row in zip(*(values for _, values, _ in columns)):
+        tbl.add_row(*row)
+    get_console().print(tbl)
+
+
+def _table_cell(value: Any, width: int, right: bool) -> str:
+    text = str(value).replace('\n', ' ')
+    if len(text) > width and not isinstance(value, (int, float)):
+        text = text[: max(width - 1, 0)] + '…'
+    return text.rjust(width) if right else text.ljust(width)
+
+
+def table_stream(
+    rows: Iterable[Dict[str, Any]],
+    title: str = '',
+    border: bool = True,
+    show_header: bool = True,
+    style_cols: Optional[Union[Dict[str, str], str]] = None,
+    widths: Optional[Union[Dict[str, int], List[int]]] = None,
+    sample: int = 100,
+    chunk_size: int = 1000,
+    padding: Optional[Tuple] = None,
+    style: Optional[str] = None,
+):
+    if OUTPUT != 'text':
+        return table(rows, title=title)
+    from rich.markup import escape
+
+    pad_left = pad_right = 1
+    if padding is not None:
+        from rich.padding import Padding
+
+        top, pad_right, bottom, pad_left = Padding.unpack(padding)
+        if top or bottom:
+            raise ValueError(
+                'Streaming tables only support horizontal padding'
+            )
+
+    rows = iter(rows)
+    head = list(itertools.islice(rows, sample))
+    if not head:
+        return
+    keys = list(head[0].keys())
+    if isinstance(widths, (list, tuple)):
+        widths = dict(zip(keys, widths))
+    widths = widths or {}
+    headers = [key.replace('_', ' ').capitalize() for key in keys]
+    columns = []
+    for key, header in zip(keys, headers):
+        width = widths.get(key)
+        if width is None:
+            width = max(
+                [len(header)] + [len(str(row.get(key, ''))) for row in head]
+            )
+        right = isinstance(head[0][key], (int, float))
+        if isinstance(style_cols, dict):
+            style_col = style_cols.get(key)
+        else:
+            style_col = style_cols
+        columns.append((key, width, right, style_col))
+    if border:
+        start = '│' + ' ' * pad_left
+        sep = ' ' * pad_right + '│' + ' ' * pad_left
+        end = ' ' * pad_right + '│'
+    elif padding is None:
+        start, sep, end = '  ', '  ', ''
+    else:
+        start, sep, end = ' ' * pad_left, ' ' * (pad_right + pad_left), ''
+    markup = any(style_col for _, _, _, style_col in columns)
+
+    def rule(left: str, middle: str, right: str) -> str:
+        parts = (
+            '─' * (width + pad_left + pad_right) for _, width, _, _ in columns
+        )
+        return left + middle.join(parts) + right
+
+    def write(lines: List[str], markup: bool = False):
+        console.print(
+            '\n'.join(lines),
+            soft_wrap=True,
+            highlight=False,
+            markup=markup,
+            style=style,
+        )
+
+    console = get_console()
+    if title:
+        console.print(title, style='italic', markup=False, highlight=False)
+    lines = [rule('┌', '┬', '┐')] if border else []
+    if show_header:
+        cells = [
+            f'[bold]{escape(_table_cell(header, width, False))}[/bold]'
+            for header, (_, width, _, _) in zip(headers, columns)
+        ]
+        lines.append(start + sep.join(cells) + end)
+        if border:
+            lines.append(rule('├', '┼', '┤'))
+    if lines:
+        write(lines, markup=True)
+    lines = []
+    for row in itertools.chain(head, rows):
+        cells = []
+        for key, width, right, style_col in columns:
+            cell = _table_cell(row.get(key, ''), width, right)
+            if markup:
+                cell = escape(cell)
+                if style_col:
+                    cell = f'[{style_col}]{cell}[/{style_col}]'
+            cells.append(cell)
+        lines.append(start + sep.join(cells) + end)
+        if len(lines) >= chunk_size:
+            write(lines, markup)
+            lines = []
+    if border:
+        lines.append(rule('└', '┴', '┘'))
+    if lines:
+        write(lines, markup)
 
 
 def ansi_clean(text: str) -> str:
@@ -212,19 +524,82 @@ def text_color(
         show_icon = ICON_SHOW
     text = str(text)
     if icon and not text.startswith(icon):
-        if CONSOLE.no_color is True or show_icon:
+        if get_console().no_color is True or show_icon:
             text = f'{icon} {text}'
     return f'[{color}]{text}[/{color}]'
 
 
+def _get_records() -> List[dict]:
+    records = _context_records.get()
+    return _records if records is None else records
+
+
+def record(level: str, **data) -> None:
+    entry = {'level': level, **data}
+    if OUTPUT == 'json':
+        _get_records().append(entry)
+        return
+    line = json.dumps(entry, ensure_ascii=False, default=str)
+    get_console().file.write(line + '\n')
+
+
+def _plain_text(text: str) -> str:
+    if '[' not in text:
+        return text
+    from rich.text import Text
+
+    return Text.from_markup(text).plain
+
+
+def finish(code: int = 0) -> None:
+    if OUTPUT == 'text':
+        return
+    record('exit', code=code)
+    if OUTPUT == 'json':
+        records = _get_records()
+        line = json.dumps(records, ensure_ascii=False, default=str)
+        records.clear()
+        get_console().file.write(line + '\n')
+
+
+@contextlib.contextmanager
+def finishing():
+    try:
+        yield
+    except SystemExit as e:
+        if e.code is None or isinstance(e.code, int):
+            finish(e.code or 0)
+        else:
+            finish(1)
+        raise
+    except KeyboardInterrupt:
+        finish(130)
+        raise
+    finish(0)
+
+
 def _print(
     text: str,
     color: str = COLOR_NORMAL,
     icon: str = None,
     show_icon: bool = None,
+    level: str = 'info',
 ) -> None:
+    text = str(text)
+    if OUTPUT != 'text':
+        record(level, msg=_plain_text(text))
+        return
+    if PLAIN and '[' not in text:
+        console = get_console()
+        if show_icon is None:
+            show_icon = ICON_SHOW
+        if icon and not text.startswith(icon):
+            if console.no_color is True or show_icon:
+                text = f'{icon} {text}'
+        console.file.write(text + '\n')
+        return
     text = text_color(text, color=color, icon=icon, show_icon=show_icon)
-    CONSOLE.print(text)
+    get_console().print(text)
 
 
 def info(text: str) -> None:
@@ -232,15 +607,29 @@ def info(text: str) -> None:
 
 
 def success(text: str, icon: bool = None) -> None:
-    _print(text, color=COLOR_SUCCESS, icon=ICON_SUCCESS, show_icon=icon)
+    _print(
+        text,
+        color=COLOR_SUCCESS,
+        icon=ICON_SUCCESS,
+        show_icon=icon,
+        level='success',
+    )
 
 
 def warn(text: str, icon: bool = None) -> None:
-    _print(text, color=COLOR_WARN, icon=ICON_WARN, show_icon=icon)
+    _print(
+        text, color=COLOR_WARN, icon=ICON_WARN, show_icon=icon, level='warn'
+    )
 
 
 def error(text: str, icon: bool = None) -> None:
-    _print(text, color=COLOR_ERROR, icon=ICON_ERROR, show_icon=icon)
+    _print(
+        text,
+        color=COLOR_ERROR,
+        icon=ICON_ERROR,
+        show_icon=icon,
+        level='error',
+    )
 
 
 def critical(text: str, code: int = 1) -> None:
@@ -248,31 +637,64 @@ def critical(text: str, code: int = 1) -> None:
     sys.exit(code)
 
 
-def _debug(text: str, color: str) -> None:
-    from clifire import application
+def set_verbose(verbose: bool, app=None) -> None:
+    global VERBOSE, _verbose_app
+    VERBOSE = 1 if verbose else 0
+    _verbose_app = app
+
+
+def set_context_verbose(verbose: bool) -> None:
+    _context_verbose.set(1 if verbose else 0)
 
-    app = application.App.current_app
-    if not app or app.get_option('verbose'):
-        _print(text, color)
 
+def _debug_enabled() -> bool:
+    global _application
+    verbose = _context_verbose.get()
+    if verbose is not None:
+        return verbose > 0
+    if _application is None:
+        from clifire import application
 
-def debug(text: str) -> None:
-    _debug(text, COLOR_DEBUG)
+        _application = application
+    app = _application.App.current_app
+    if app is not _verbose_app:
+        set_verbose(not app or app.get_option('verbose'), app)
+    return VERBOSE > 0
 
 
-def debug2(text: str) -> None:
-    _debug(f'· {text}', COLOR_DEBUG2)
+def _debug_text(text, args: tuple) -> str:
+    if callable(text):
+        return text()
+    return text % args if args else text
+
+
+def debug(text, *args) -> None:
+    if _debug_enabled():
+        _print(_debug_text(text, args), COLOR_DEBUG, level='debug')
+
+
+def debug2(text, *args) -> None:
+    if _debug_enabled():
+        text = _debug_text(text, args)
+        _print(f'· {text}', COLOR_DEBUG2, level='debug2')
 
 
 def var_dump(var) -> None:
-    CONSOLE.print(var, highlight=True)
+    if OUTPUT != 'text':
+        return record('var', data=var)
+    get_console().print(var, highlight=True)
 
 
 def ask(text: str, choices: List[str] = False):
+    from rich.prompt import Prompt
+
     if choices is False:
         choices = ['y', 'n']
     return Prompt.ask(
-        text, choices=choices, default=choices[0] if choices else None
+        text,
+        choices=choices,
+        default=choices[0] if choices else None,
+        console=get_console(),
     )
 
 
@@ -280,4 +702,6 @@ def rule(text: str) -> None:
     global _current_live
     if _current_live:
         _current_live.info(text)
-    CONSOLE.rule(f'[bold blue]{text}', align='left', style='blue')
+    if OUTPUT != 'text':
+        return record('rule', msg=_plain_text(text))
+    get_console().rule(f'[bold blue]{text}', align='left', style='blue')
@@ -1,12 +1,33 @@
+import json
+import signal
+from typing import Any, Iterator, List, Optional, Union
+
 from clifire import out
 
+Output = Union[str, bytes, None]
+
 
 class Result:
-    def __init__(self, code: int = 0, stdout: str = '', stderr: str = ''):
+    def __init__(
+        self,
+        code: int = 0,
+        stdout: Output = '',
+        stderr: Output = '',
+        exception: Optional[BaseException] = None,
+    ):
         self.code = code
-        self.stdout = self._clean_str(stdout)
-        self.stderr = self._clean_str(stderr)
-        out.debug2(f'Result: {self}')
+        self.exception = exception
+        self._raw = {'stdout': stdout or b'', 'stderr': stderr or b''}
+        self._text = {}
+        out.debug2(
+            lambda: f'Result: code {code}, stdout {self._size("stdout")}, '
+            f'stderr {self._size("stderr")}'
+        )
+
+    def _size(self, name: str) -> str:
+        raw = self._raw[name]
+        unit = 'chars' if isinstance(raw, str) else 'bytes'
+        return f'{len(raw)} {unit}'
 
     def _clean_str(self, value):
         value = value.decode('utf8') if isinstance(value, bytes) else value
@@ -14,6 +35,54 @@ class Result:
             value = value[:-1]
         return value
 
+    def _get_text(self, name: str) -> str:
+        if name not in self._text:
+            self._text[name] = self._clean_str(self._raw[name])
+        return self._text[name]
+
+    def _set_text(self, name: str, value: Output):
+        self._raw[name] = value or b''
+        self._text.pop(name, None)
+
+    @property
+    def stdout(self) -> str:
+        return self._get_text('stdout')
+
+    @stdout.setter
+    def stdout(self, value: Output):
+        self._set_text('stdout', value)
+
+    @property
+    def stderr(self) -> str:
+        return self._get_text('stderr')
+
+    @stderr.setter
+    def stderr(self, value: Output):
+        self._set_text('stderr', value)
+
+    @property
+    def bytes(self) -> bytes:
+        raw = self._raw['stdout']
+        if isinstance(raw, str):
+            raw = self._raw['stdout'] = raw.encode('utf8')
+        return raw
+
+    def lines(self) -> Iterator[str]:
+        if 'stdout' in self._text or isinstance(self._raw['stdout'], str):
+            yield from self.stdout.splitlines()
+            return
+        data = self._raw['stdout']
+        start = 0
+        while start < len(data):
+            end = data.find(b'\n', start)
+            if end == -1:
+                end = len(data)
+            yield data[start:end].rstrip(b'\r').decode('utf8')
+            start = end + 1
+
+    def json(self) -> Any:
+        return json.loads(self.bytes)
+
     def __bool__(self) -> bool:
         return self.code == 0
 
@@ -30,11 +99,31 @@ class Result:
         )
 
 
+class PipeResult(Result):
+    def __init__(
+        self, codes: List[int], stdout: Output = '', stderr: Output = ''
+    ):
+        self.codes = codes
+        failed = [c for c in codes[:-1] if c and c != -signal.SIGPIPE]
+        code = codes[-1] or (failed[-1] if failed else 0)
+        super().__init__(code=code, stdout=stdout, stderr=stderr)
+
+    def __repr__(self) -> str:
+        return str(
+            {
+                'code': self.code,
+                'codes': self.codes,
+                'stdout': self.stdout,
+                'stderr': self.stderr,
+            }
+        )
+
+
 class ResultOk(Result):
-    def __init__(self, stdout: str = ''):
+    def __init__(self, stdout: Output = ''):
         super().__init__(code=0, stdout=stdout)
 
 
 class ResultError(Result):
-    def __init__(self, stderr: str = '', code: int = 1):
+    def __init__(self, stderr: Output = '', code: int = 1):
         super().__init__(code=code, stderr=stderr)
@@ -0,0 +1,90 @@
+import shlex
+from concurrent import futures
+from typing import Dict, List, Union
+
+from clifire import command, out
+
+
+class Scheduler:
+    def __init__(self, app, jobs: int = 1):
+        self.app = app
+        self.jobs = max(1, jobs or 1)
+
+    def key(self, command_line: Union[str, List[str]]) -> str:
+        return shlex.join(command.tokenize(command_line))
+
+    def graph(self, command_lines: List[str]) -> Dict[str, List[str]]:
+        graph = {}
+        path = []
+
+        def visit(node: str):
+            if node in path:
+                cycle = ' -> '.join(path[path.index(node) :] + [node])
+                raise command.CommandException(f'Dependency cycle: {cycle}')
+            if node in graph:
+                return
+            path.append(node)
+            cls = self.app.find_command(node)
+            if cls is None:
+                raise command.CommandException(
+                    f'The dependency "{node}" is not a command'
+                )
+            depends = [self.key(depend) for depend in cls._depends]
+            for depend in depends:
+                visit(depend)
+            path.pop()
+            graph[node] = depends
+
+        for command_line in command_lines:
+            visit(self.key(command_line))
+        return graph
+
+    def launch(self, node: str) -> int:
+        cmd = self.app.get_command(node)
+        try:
+            res = cmd.launch(cmd.tokens, depends=False)
+        except SystemExit as e:
+            if e.code is None or isinstance(e.code, int):
+                return e.code or 0
+            out.error(e.code)
+            return 1
+        if isinstance(res, int) and not isinstance(res, bool):
+            return res
+        return 0
+
+    def run(self, command_lines: List[str]):
+        pending = self.graph(command_lines)
+        out.debug(lambda: f'Run dependencies: {", ".join(pending)}')
+        done = set()
+        running = {}
+        failed = None
+        with futures.ThreadPoolExecutor(max_workers=self.jobs) as pool:
+            while pending or running:
+                ready = [
+                    node
+                    for node, depends in pending.items()
+                    if all(depend in done for depend in depends)
+                ]
+                for node in ready:
+                    del pending[node]
+                    running[pool.submit(self.launch, node)] = node
+                finished, _ = futures.wait(
+                    running, return_when=futures.FIRST_COMPLETED
+                )
+                for future in finished:
+                    node = running.pop(future)
+                    try:
+                        code = future.result()
+                    except Exception as e:
+                        code, failed = 1, failed or (node, e)
+                    if code:
+                        failed = failed or (node, code)
+                        pending.clear()
+                    else:
+                        done.add(node)
+        if failed is None:
+            return
+        node, error = failed
+        if isinstance(error, Exception):
+            raise error
+        out.critical(f'Dependency "{node}" failed', code=error)
@@ -0,0 +1,101 @@
+import os
+import selectors
+import shlex
+import subprocess
+import uuid
+
+from clifire import out, result
+
+
+class ShellSession:
+    def __init__(self, env: dict = None, path: str = None, shell='/bin/sh'):
+        self.proc = subprocess.Popen(
+            [shell],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            env=env,
+            cwd=path,
+        )
+        self.marker = f'__clifire_{uuid.uuid4().hex}__'.encode()
+
+    @property
+    def is_alive(self) -> bool:
+        return self.proc.poll() is None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def shell(self, cmd: str, check: bool = False) -> result.Result:
+        if not self.is_alive:
+            return result.ResultError('Shell session is closed')
+        out.debug('Shell session: %s', cmd)
+        marker = self.marker.decode()
+        script = (
+            f'command eval {shlex.quote(cmd)} </dev/null\n'
+            f'printf "\\n{marker} %d\\n" $?\n'
+            f'printf "\\n{marker}\\n" >&2\n'
+        )
+        try:
+            self.proc.stdin.write(script.encode())
+            self.proc.stdin.flush()
+        except BrokenPipeError:
+            return result.ResultError('Shell session is closed')
+        stdout, stderr, code = self._read()
+        if check and code:
+            return result.ResultError(stderr, code)
+        return result.Result(code, stdout, stderr)
+
+    def _read(self):
+        buffers = {self.proc.stdout: b'', self.proc.stderr: b''}
+        ends = {
+            self.proc.stdout: b'\n' + self.marker + b' ',
+            self.proc.stderr: b'\n' + self.marker + b'\n',
+        }
+        found = {}
+        done = {}
+        with selectors.DefaultSelector() as selector:
+            for pipe in buffers:
+                selector.register(pipe, selectors.EVENT_READ)
+            while len(done) < len(buffers):
+                for key, _ in selector.select():
+                    pipe = key.fileobj
+                    chunk = os.read(pipe.fileno(), 65536)
+                    if not chunk:
+                        selector.unregister(pipe)
+                        done[pipe] = len(buffers[pipe])
+                        continue
+                    if pipe not in found:
+                        start = max(0, len(buffers[pipe]) - len(ends[pipe]))
+                    buffers[pipe] += chunk
+                    if pipe not in found:
+                        index = buffers[pipe].find(ends[pipe], start)
+                        if index != -1:
+                            found[pipe] = index
+                    if pipe in found and buffers[pipe].endswith(b'\n'):
+                        selector.unregister(pipe)
+                        done[pipe] = found[pipe]
+        stdout = buffers[self.proc.stdout]
+        stderr = buffers[self.proc.stderr]
+        index = done[self.proc.stdout]
+        if index == len(stdout):
+            return stdout, stderr, self.proc.wait()
+        code = int(stdout[index + len(ends[self.proc.stdout]) :])
+        return stdout[:index], stderr[: done[self.proc.stderr]], code
+
+    def close(self):
+        if self.proc.stdin and not self.proc.stdin.closed:
+            try:
+                self.proc.stdin.close()
+            except BrokenPipeError:
+                pass
+        try:
+            self.proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+            self.proc.wait()
+        for pipe in (self.proc.stdout, self.proc.stderr):
+            pipe.close()
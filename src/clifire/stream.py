@@ -0,0 +1,89 @@
+import collections
+import subprocess
+import threading
+from typing import Callable, Iterator, Optional
+
+from clifire import out, result
+
+LineCallback = Optional[Callable[[str], None]]
+TAIL = 1000
+
+
+class Stream:
+    def __init__(
+        self,
+        proc: subprocess.Popen,
+        on_line: LineCallback = None,
+        on_stderr: LineCallback = None,
+        tee: bool = False,
+        tail: Optional[int] = TAIL,
+    ):
+        self.proc = proc
+        self.on_line = on_line
+        self.on_stderr = on_stderr
+        self.tee = tee
+        self.stdout = collections.deque(maxlen=tail)
+        self.stderr = collections.deque(maxlen=tail)
+        self.line_count = 0
+        self.stderr_count = 0
+        self._result = None
+        self._thread = None
+        if proc.stderr is not None:
+            self._thread = threading.Thread(
+                target=self._read_stderr, daemon=True
+            )
+            self._thread.start()
+
+    def _read_stderr(self):
+        for line in self.proc.stderr:
+            line = line.rstrip('\n')
+            self.stderr_count += 1
+            self.stderr.append(line)
+            if self.tee:
+                out.get_console().print(
+                    line, style=out.COLOR_ERROR, markup=False, highlight=False
+                )
+            if self.on_stderr:
+                self.on_stderr(line)
+
+    def __iter__(self) -> Iterator[str]:
+        if self.proc.stdout is None:
+            return
+        for line in self.proc.stdout:
+            line = line.rstrip('\n')
+            self.line_count += 1
+            self.stdout.append(line)
+            if self.tee:
+                out.get_console().print(line, markup=False, highlight=False)
+            if self.on_line:
+                self.on_line(line)
+            yield line
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        if self.proc.poll() is None:
+            self.proc.kill()
+        self.wait()
+
+    def wait(self) -> result.Result:
+        if self._result is not None:
+            return self._result
+        for _ in self:
+            pass
+        code = self.proc.wait()
+        if self._thread:
+            self._thread.join()
+        for pipe in (self.proc.stdout, self.proc.stderr):
+            if pipe is not None:
+                pipe.close()
+        out.debug2(
+            'Stream: %s stdout lines, %s stderr lines',
+            self.line_count,
+            self.stderr_count,
+        )
+        self._result = result.Result(
+            code, '\n'.join(self.stdout), '\n'.join(self.stderr)
+        )
+        return self._result
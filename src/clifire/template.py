@@ -2,16 +2,23 @@ import os
 import re
 from typing import List
 
-import jinja2
 from clifire import application
 
 
 class Template:
     def __init__(self, template_folder: str):
         self.template_folder = template_folder
-        self.jinja2 = jinja2.Environment(
-            loader=jinja2.FileSystemLoader(template_folder)
-        )
+        self._jinja2 = None
+
+    @property
+    def jinja2(self):
+        if self._jinja2 is None:
+            import jinja2
+
+            self._jinja2 = jinja2.Environment(
+                loader=jinja2.FileSystemLoader(self.template_folder)
+            )
+        return self._jinja2
 
     def path(self, *args: List[str]) -> str:
         return application.App.current_app.path(self.template_folder, *args)
@@ -1,4 +1,6 @@
 import os
+import shlex
+import signal
 import subprocess
 import sys
 import time
@@ -159,3 +161,494 @@ def test_traceback_standard_mode(capsys, monkeypatch):
     with pytest.raises(ZeroDivisionError):
         app.fire('error')
     assert sys.excepthook == sys.__excepthook__
+
+
+def test_app_lazy_imports():
+    code = '\n'.join(
+        [
+            'import sys',
+            'from clifire import application',
+            'application.App(config_files=["/not/exists.yaml"])',
+            'print(",".join(sorted(sys.modules)))',
+        ]
+    )
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    proc = subprocess.run(
+        [sys.executable, '-c', code], capture_output=True, env=env, check=True
+    )
+    modules = proc.stdout.decode().strip().split(',')
+    assert 'clifire.application' in modules
+    assert 'rich' not in modules
+    assert 'rich.console' not in modules
+    assert 'jinja2' not in modules
+    assert 'yaml' not in modules
+
+
+def test_app_lazy_imports_on_use(tmp_path):
+    config_file = tmp_path / 'config.yaml'
+    config_file.write_text('name: test\n')
+    code = '\n'.join(
+        [
+            'import sys',
+            'from clifire import application',
+            f'app = application.App(config_files=[{str(config_file)!r}])',
+            'print("yaml" in sys.modules)',
+            'print("rich.console" in sys.modules)',
+            'app.fire("version")',
+            'print("rich.console" in sys.modules)',
+        ]
+    )
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    proc = subprocess.run(
+        [sys.executable, '-c', code], capture_output=True, env=env, check=True
+    )
+    lines = proc.stdout.decode().strip().splitlines()
+    assert lines[0] == 'True'
+    assert lines[1] == 'False'
+    assert lines[-1] == 'True'
+
+
+def test_app_fire_argv(capsys, monkeypatch):
+    class CommandEcho(command.Command):
+        _name = 'echo.text'
+
+        text = command.Field(pos=1, help='Text')
+
+        def fire(self):
+            out.info(f'<{self.text}>')
+
+    app = application.App()
+    app.add_command(CommandEcho)
+    quoted = '"quoted"'
+    text = f"it's {quoted} text"
+    app.fire_argv(['echo', 'text', text])
+    assert f'<{text}>' in output(capsys)
+
+    cmd = app.get_command(['echo', 'text', 'a b'])
+    assert cmd.tokens == ['echo', 'text', 'a b']
+    assert cmd.command_line == "echo text 'a b'"
+
+    calls = []
+    split = shlex.split
+    monkeypatch.setattr(shlex, 'split', lambda s: calls.append(s) or split(s))
+    app.fire_argv(['echo', 'text', 'argv'])
+    assert calls == []
+    assert '<argv>' in output(capsys)
+    app.fire('echo text "one line"')
+    assert calls == ['echo text "one line"']
+    assert '<one line>' in output(capsys)
+
+    app.fire_argv(['echo'])
+    printed = output(capsys)
+    assert 'Available Commands:' in printed
+    assert ' text ' in printed
+
+
+def test_app_fire_many(capsys):
+    class CommandExit(command.Command):
+        _name = 'exit'
+
+        code = command.Field(pos=1, help='Exit code', force_type=int)
+        option = command.Field(help='Sample option', default=False)
+
+        def fire(self):
+            out.info(f'verbose={self.app.get_option("verbose")}')
+            if self.code == 99:
+                raise ValueError('Unexpected')
+            if self.code == 98:
+                sys.exit('Exit message')
+            return self.code
+
+    app = application.App()
+    app.add_command(CommandExit)
+    codes = app.fire_many(
+        [
+            'exit 0 -v',
+            'exit 0',
+            ['exit', '3'],
+            'exit',
+            'not-exists',
+            'exit 99',
+            'exit 98',
+            'exit 0 --option',
+        ]
+    )
+    assert codes == [0, 0, 3, 40, 20, 1, 1, 0]
+    printed = output(capsys)
+    assert printed.count('verbose=True') == 1
+    assert printed.count('verbose=False') == 5
+    assert 'ValueError: Unexpected' in printed
+    assert 'Exit message' in printed
+    assert app.get_option('verbose') is False
+
+
+def test_app_run(capsys):
+    class CommandEcho(command.Command):
+        _name = 'echo'
+
+        text = command.Field(pos=1, help='Text to print')
+        code = command.Field(help='Exit code', default=0)
+
+        def fire(self):
+            out.info(self.text)
+            if self.text == 'fail':
+                raise ValueError('Unexpected')
+            return self.code
+
+    app = application.App()
+    app.add_command(CommandEcho)
+    res = app.run('echo Hello')
+    assert res.code == 0
+    assert res.stdout == 'Hello'
+    assert res.exception is None
+
+    res = app.run(['echo', 'Bye', '--code', '3'])
+    assert res.code == 3
+    assert res.stdout == 'Bye'
+
+    res = app.run('echo')
+    assert res.code == 40
+
+    res = app.run('not-exists')
+    assert res.code == 20
+    assert 'Command "not-exists" not found.' in res.stdout
+
+    res = app.run('echo fail')
+    assert res.code == 1
+    assert isinstance(res.exception, ValueError)
+    assert 'ValueError: Unexpected' in res.stderr
+    assert output(capsys) == ''
+
+    res = app.run('echo -v Hello')
+    assert res.code == 0
+    assert app.get_option('verbose') is False
+
+
+def test_app_run_threads(capsys):
+    from concurrent.futures import ThreadPoolExecutor
+
+    class CommandEcho(command.Command):
+        _name = 'echo'
+
+        text = command.Field(pos=1, help='Text to print')
+
+        def fire(self):
+            for _ in range(10):
+                out.info(self.text)
+                time.sleep(0.001)
+
+    app = application.App()
+    app.add_command(CommandEcho)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(
+            executor.map(app.run, [f'echo text{i}' for i in range(8)])
+        )
+    for i, res in enumerate(results):
+        assert res.stdout.splitlines() == [f'text{i}'] * 10
+    assert output(capsys) == ''
+
+
+def test_app_run_threads_options(capsys):
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+
+    loud_verbose = threading.Event()
+    slow_done = threading.Event()
+    app = application.App()
+
+    @command.fire
+    def loud(cmd):
+        loud_verbose.set()
+        slow_done.wait(1)
+        out.debug('Loud debug')
+
+    @command.fire
+    def slow(cmd):
+        loud_verbose.wait(1)
+        out.debug('Slow debug')
+        out.info(f'verbose={cmd.app.get_option("verbose")}')
+        slow_done.set()
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        loud_res, slow_res = executor.map(app.run, ['loud -v', 'slow'])
+    assert 'Loud debug' in loud_res.stdout
+    assert 'Slow debug' not in slow_res.stdout
+    assert slow_res.stdout == 'verbose=False'
+    assert app.get_option('verbose') is False
+    assert output(capsys) == ''
+
+
+def test_shell_many(capsys):
+    app = application.App()
+    test_path = os.path.dirname(__file__)
+    start = time.time()
+    results = app.shell_many(
+        [f'sleep 0.{5 - i}; echo {i}' for i in range(5)],
+        max_workers=5,
+        progress=False,
+    )
+    assert time.time() - start < 1.5
+    assert [res.stdout for res in results] == ['0', '1', '2', '3', '4']
+
+    results = app.shell_many(['pwd', 'exit 3'], path=test_path)
+    assert results[0].stdout == test_path
+    assert results[1].code == 3
+    assert os.getcwd() != test_path
+    assert '1 of 2 commands failed' in output(capsys)
+
+    sid = f'{shlex.quote(sys.executable)} -c "import os; print(os.getsid(0))"'
+    results = app.shell_many([sid], progress=False)
+    assert results[0].stdout == str(os.getsid(0))
+    results = app.shell_many([sid], fail_fast=True, progress=False)
+    assert results[0].stdout != str(os.getsid(0))
+
+
+def test_shell_many_fail_fast():
+    app = application.App()
+    start = time.time()
+    results = app.shell_many(
+        ['sleep 5', 'exit 2', 'sleep 5', 'echo never'],
+        max_workers=2,
+        fail_fast=True,
+        progress=False,
+    )
+    assert time.time() - start < 4
+    assert results[0].code != 0
+    assert results[1].code == 2
+    assert results[2].stderr == 'Cancelled'
+    assert results[3].stderr == 'Cancelled'
+
+
+def test_ashell():
+    import asyncio
+
+    app = application.App()
+    test_path = os.path.dirname(__file__)
+
+    async def run_all():
+        return await asyncio.gather(
+            app.ashell('sleep 0.3; pwd', path=test_path),
+            app.ashell('echo $MY_ENV_VALUE', env={'MY_ENV_VALUE': 'is_ok!'}),
+            app.ashell('echo error >&2; exit 3', check=True),
+            app.ashell('echo Hello World', shell=False),
+        )
+
+    res = asyncio.run(run_all())
+    assert res[0].stdout == test_path
+    assert res[1].stdout == 'is_ok!'
+    assert isinstance(res[2], application.result.ResultError)
+    assert res[2].code == 3
+    assert res[2].stderr == 'error'
+    assert res[3].stdout == 'Hello World'
+
+
+def test_pipe(tmp_path):
+    app = application.App()
+    res = app.pipe('seq 1 100000', 'grep 7', ['wc', '-l'])
+    assert res.code == 0
+    assert res.codes == [0, 0, 0]
+    assert res.stdout == '40951'
+
+    res = app.pipe('seq 1 100000', 'head -n 2')
+    assert res.stdout == '1\n2'
+    assert res.code == 0
+    assert res.codes[0] in (0, -signal.SIGPIPE)
+
+    res = app.pipe('sh -c "exit 3"', 'sh -c "cat; exit 2"', 'cat')
+    assert res.codes == [3, 2, 0]
+    assert res.code == 2
+
+    res = app.pipe(
+        'echo $MY_ENV_VALUE; pwd',
+        'sort',
+        shell=True,
+        env={'MY_ENV_VALUE': 'is_ok!'},
+        path=str(tmp_path),
+    )
+    assert res.stdout == f'{tmp_path}\nis_ok!'
+
+    res = app.pipe('echo error', 'sh -c "cat >&2; exit 5"', check=True)
+    assert isinstance(res, application.result.ResultError)
+    assert res.code == 5
+    assert res.stderr == 'error'
+
+    with pytest.raises(FileNotFoundError):
+        app.pipe('seq 1 10', 'command-not-exists')
+
+    with pytest.raises(ValueError):
+        app.pipe()
+
+
+def test_app_fire_each(capsys, tmp_path):
+    class CommandGreet(command.Command):
+        _name = 'greet'
+
+        user = command.Field(pos=1, help='User to greet')
+
+        def fire(self):
+            start = time.time()
+            time.sleep(0.3)
+            runs.append((start, time.time(), self.tokens))
+            out.info(f'Hi {self.user}!')
+            if self.user == 'Fail':
+                return 4
+
+    runs = []
+
+    app = application.App()
+    app.add_option('each', command.Field(default=''))
+    app.add_option('jobs', command.Field(default=1))
+    app.add_command(CommandGreet)
+    users = tmp_path / 'users.txt'
+    users.write_text('# Users\nRob\n\nElvis Presley\nAnn\n')
+    app.fire(f'greet --each {users} --jobs 3 -v')
+    assert len(runs) == 3
+    assert max(start for start, _, _ in runs) < min(end for _, end, _ in runs)
+    assert sorted(tokens for _, _, tokens in runs) == [
+        ['greet', 'Ann'],
+        ['greet', 'Elvis Presley'],
+        ['greet', 'Rob'],
+    ]
+    assert app.get_option('verbose') is True
+    app.set_option('verbose', False)
+    printed = output(capsys)
+    assert printed.index('Rob') < printed.index('Hi Rob!')
+    assert printed.index('Hi Rob!') < printed.index('Elvis Presley')
+    assert printed.index('Elvis Presley') < printed.index('Hi Elvis Presley!')
+    assert printed.index('Hi Elvis Presley!') < printed.index('Hi Ann!')
+    assert '3 items executed.' in printed
+
+    users.write_text('Rob\nFail\n')
+    with pytest.raises(SystemExit) as excinfo:
+        app.fire(f'greet --each={users}')
+    assert '1' == str(excinfo.value)
+    printed = output(capsys)
+    assert 'Hi Rob!' in printed
+    assert 'Failed items' in printed
+    assert 'Fail    4' in printed
+    assert '1 of 2 items failed.' in printed
+
+
+def test_app_fire_each_json(capsys, tmp_path, monkeypatch):
+    import json
+
+    for name in ('OUTPUT', 'PLAIN', 'ANSI'):
+        monkeypatch.setattr(out, name, getattr(out, name))
+    app = application.App()
+    app.add_option('each', command.Field(default=''))
+
+    @command.fire
+    def hello(cmd, user: str = ''):
+        out.info(f'Hello {user}')
+
+    users = tmp_path / 'users.txt'
+    users.write_text('Rob\nAnn\n')
+    with pytest.raises(SystemExit) as excinfo:
+        app.fire(f'hello --each {users} --output json')
+    assert '40' == str(excinfo.value)
+    records = json.loads(output(capsys))
+    assert records[-1] == {'level': 'exit', 'code': 40}
+    assert 'use --output ndjson' in records[0]['msg']
+
+
+def test_app_output_records(capsys, monkeypatch):
+    import json
+
+    for name in ('OUTPUT', 'PLAIN', 'ANSI'):
+        monkeypatch.setattr(out, name, getattr(out, name))
+
+    class CommandUsers(command.Command):
+        _name = 'users'
+
+        code = command.Field(help='Exit code', default=0)
+
+        def fire(self):
+            out.info('Listing [bold]users[/bold]')
+            out.table(
+                [{'name': 'Rob', 'age': 18}, {'name': 'Ann', 'age': 20}],
+                title='Users',
+            )
+            out.warn('Done')
+            if self.code:
+                out.critical('Failed', code=self.code)
+
+    app = application.App()
+    app.add_command(CommandUsers)
+    app.fire('users --output ndjson')
+    records = [json.loads(line) for line in output(capsys).splitlines()]
+    assert records == [
+        {'level': 'info', 'msg': 'Listing users'},
+        {'level': 'row', 'table': 'Users', 'data': {'name': 'Rob', 'age': 18}},
+        {'level': 'row', 'table': 'Users', 'data': {'name': 'Ann', 'age': 20}},
+        {'level': 'warn', 'msg': 'Done'},
+        {'level': 'exit', 'code': 0},
+    ]
+
+    with pytest.raises(SystemExit):
+        app.fire('users --output=json --code 3')
+    records = json.loads(output(capsys))
+    assert [record['level'] for record in records] == [
+        'info',
+        'row',
+        'row',
+        'warn',
+        'error',
+        'exit',
+    ]
+    assert records[-1] == {'level': 'exit', 'code': 3}
+
+    with pytest.raises(SystemExit) as excinfo:
+        app.fire('users --output xml')
+    assert '40' == str(excinfo.value)
+    assert 'Invalid output format "xml"' in output(capsys)
+
+    app.fire('users')
+    assert 'Listing users' in output(capsys)
+
+
+def test_app_output_scope(capsys, monkeypatch):
+    import json
+
+    for name in ('OUTPUT', 'PLAIN', 'ANSI'):
+        monkeypatch.setattr(out, name, getattr(out, name))
+    monkeypatch.setattr(sys, 'argv', ['script', '--output', 'report.txt'])
+    app = application.App()
+    assert app.get_option('output') == 'text'
+
+    @command.fire
+    def build(cmd, _output: str = 'dist'):
+        out.info(f'Build in {cmd.output}')
+
+    @command.fire
+    def hello(cmd):
+        out.info('Hello')
+
+    app.fire('build --output out')
+    assert 'Build in out' in output(capsys)
+    assert app.get_option('output') == 'text'
+
+    with pytest.raises(SystemExit) as excinfo:
+        app.fire('nope --output ndjson')
+    assert '20' == str(excinfo.value)
+    records = [json.loads(line) for line in output(capsys).splitlines()]
+    assert records == [
+        {'level': 'error', 'msg': 'Command "nope" not found.'},
+        {'level': 'exit', 'code': 20},
+    ]
+
+    app.set_option('output', 'text')
+    assert [0, 0] == app.fire_many(['hello --output json', 'hello'])
+    lines = output(capsys).splitlines()
+    assert json.loads(lines[0]) == [
+        {'level': 'info', 'msg': 'Hello'},
+        {'level': 'exit', 'code': 0},
+    ]
+    assert lines[1] == 'Hello'
+
+    app.set_option('output', 'ndjson')
+    out.setup(output='ndjson')
+    res = app.run('hello')
+    assert [json.loads(line) for line in res.stdout.splitlines()] == [
+        {'level': 'info', 'msg': 'Hello'},
+        {'level': 'exit', 'code': 0},
+    ]
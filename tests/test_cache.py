@@ -0,0 +1,42 @@
+import os
+import time
+
+from clifire import application, cache
+
+
+def test_shell_cache(tmp_path):
+    app = application.App(cache_folder=str(tmp_path))
+    counter = tmp_path / 'counter'
+    bash = f'echo run >> {counter}; wc -l < {counter}'
+
+    assert app.shell(bash, cache=60).stdout == '1'
+    assert app.shell(bash, cache=60).stdout == '1'
+    assert app.shell(bash).stdout == '2'
+    assert app.shell(bash, cache=60, env={'OTHER': '1'}).stdout == '3'
+    assert app.shell(bash, cache=60, path=str(tmp_path)).stdout == '4'
+    assert app.shell(bash, cache=60).stdout == '1'
+
+    time.sleep(0.1)
+    assert app.shell(bash, cache=0.05).stdout == '5'
+    assert app.shell(bash, cache=60).stdout == '5'
+
+    assert app.shell_cache_clear(bash) == 3
+    assert app.shell(bash, cache=60).stdout == '6'
+    assert app.shell_cache_clear() == 1
+    assert app.shell_cache_clear() == 0
+
+
+def test_shell_cache_errors(tmp_path):
+    app = application.App(cache_folder=str(tmp_path))
+    res = app.shell('echo error >&2; exit 3', cache=60, check=True)
+    assert isinstance(res, application.result.ResultError)
+    assert res.stderr == 'error'
+    assert os.listdir(tmp_path) == []
+
+
+def test_shell_cache_default_folder(monkeypatch, tmp_path):
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path))
+    application.App()
+    folder = application.App.shell_cache().folder
+    assert folder == cache.default_folder()
+    assert folder.startswith(os.path.join(str(tmp_path), 'clifire'))
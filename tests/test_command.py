@@ -1,4 +1,5 @@
 import sys
+import time
 
 import pytest
 from clifire import application, command, out
@@ -454,3 +455,80 @@ def test_command_return_error_code(capsys):
     with pytest.raises(SystemExit) as excinfo:
         app.fire('test')
     assert excinfo.value.code == 99
+
+
+def test_command_schema():
+    class CommandTest(CommandContact):
+        _name = 'test'
+
+        list_option = command.Field(help='Sample list option', default=[])
+        option = None
+
+    app = application.App()
+    app.add_commands([CommandContact, CommandTest])
+
+    cmd_1 = app.get_command('contact')
+    cmd_2 = app.get_command('contact')
+    assert cmd_1._fields is cmd_2._fields
+    assert cmd_1._options is cmd_2._options
+    assert CommandContact._get_schema() is CommandContact._schema
+    assert cmd_1._argument_names == ['name', 'age']
+
+    cmd_1.parse('contact NAME 20 --int 5')
+    cmd_2.parse('contact OTHER')
+    assert (cmd_1.name, cmd_1.age, cmd_1.int_option) == ('NAME', 20, 5)
+    assert (cmd_2.name, cmd_2.age, cmd_2.int_option) == ('OTHER', 18, 1)
+
+    cmd = app.get_command('test')
+    assert CommandTest._schema is not CommandContact._schema
+    assert 'list_option' in cmd._fields
+    assert 'list_option' not in cmd_1._fields
+    assert 'option' not in cmd._fields
+    assert 'option' in cmd_1._fields
+
+
+def test_command_fire_binding(monkeypatch):
+    app = application.App()
+
+    def sample(cmd, user: str = 'Rob', _sudo: bool = False):
+        return f'{user} {_sudo}'
+
+    wrapper = command.fire(sample)
+    monkeypatch.setattr(command.inspect, 'signature', None)
+    cmd = app.get_command('sample')
+    cmd.parse('sample Elvis --sudo')
+    assert wrapper(cmd) == 'Elvis True'
+    cmd = app.get_command('sample')
+    assert cmd.launch('sample') == 'Rob False'
+
+
+def test_command_async_fire(capsys):
+    import asyncio
+
+    app = application.App()
+
+    @command.fire
+    async def sleep(cmd, count: int = 3):
+        started = time.time()
+        res = await asyncio.gather(
+            *(cmd.app.ashell('sleep 0.3; echo done') for _ in range(count))
+        )
+        out.info(f'{len(res)} {time.time() - started < 1}')
+        return 5
+
+    class CommandWait(command.Command):
+        _name = 'wait'
+
+        async def fire(self):
+            await asyncio.sleep(0.01)
+            return 4
+
+    app.add_command(CommandWait)
+    assert app.get_command('sleep').launch('sleep') == 5
+    assert '3 True' in output(capsys)
+    assert app.get_command('wait').launch('wait') == 4
+
+    async def nested():
+        return app.get_command('wait').launch('wait')
+
+    assert asyncio.run(nested()) == 4
@@ -0,0 +1,188 @@
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import pytest
+from clifire import daemon
+
+from tests.test_output import output
+
+FILE_GREET = """
+import os
+import time
+
+from clifire import command, out
+
+COUNT = []
+
+
+@command.fire
+def greet(cmd, user: str = 'World'):
+    out.info(f'{MESSAGE} {user} from {os.getcwd()}!')
+    return int(os.environ.get('GREET_CODE', '0'))
+
+
+@command.fire
+def count(cmd):
+    COUNT.append(1)
+    out.info(f'Count {len(COUNT)}')
+
+
+@command.fire
+def sleep(cmd):
+    time.sleep(10)
+"""
+
+
+def write_greet(project, message):
+    filename = os.path.join(project, 'fire', 'greet.py')
+    with open(filename, 'w') as file:
+        file.write(f'MESSAGE = {message!r}\n{FILE_GREET}')
+    stat = os.stat(filename)
+    os.utime(filename, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+
+@pytest.fixture
+def project():
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        os.makedirs(os.path.join(tmpdirname, 'fire', 'child'))
+        write_greet(tmpdirname, 'Hello')
+        yield tmpdirname
+
+
+@pytest.fixture(params=[[], ['--fork']], ids=['daemon', 'fork'])
+def server(project, request):
+    fire_path = os.path.join(project, 'fire')
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    proc = subprocess.Popen(
+        [sys.executable, '-m', 'clifire.main', '--daemon'] + request.param,
+        cwd=project,
+        env=env,
+        stdout=subprocess.DEVNULL,
+    )
+    path = daemon.socket_path(fire_path)
+    for _ in range(100):
+        if os.path.exists(path):
+            break
+        time.sleep(0.05)
+    try:
+        yield fire_path, bool(request.param)
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+    assert not os.path.exists(path)
+
+
+def forward(fire_path, argv):
+    with tempfile.TemporaryFile() as stdout:
+        code = daemon.forward(
+            fire_path, argv, fds=(0, stdout.fileno(), stdout.fileno())
+        )
+        stdout.seek(0)
+        return code, stdout.read().decode()
+
+
+def test_daemon_not_running(project):
+    assert daemon.forward(os.path.join(project, 'fire'), ['help']) is None
+
+
+def test_daemon_private_socket(project, monkeypatch, capsys):
+    uid = os.getuid()
+    fire_path = os.path.join(project, 'fire')
+    monkeypatch.setenv('XDG_RUNTIME_DIR', project)
+    path = daemon.socket_path(fire_path)
+    folder = os.path.dirname(path)
+    assert folder == os.path.join(project, f'clifire-{os.getuid()}')
+    os.makedirs(folder, mode=0o700)
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.bind(path)
+        assert daemon.is_trusted(path)
+
+        os.chmod(folder, 0o777)
+        assert not daemon.is_trusted(path)
+        assert daemon.forward(fire_path, ['help']) is None
+        assert 'Ignoring the daemon socket' in output(capsys)
+
+        os.chmod(folder, 0o700)
+        monkeypatch.setattr(daemon.os, 'getuid', lambda: 12345)
+        assert not daemon.is_private_folder(folder)
+        assert not daemon.is_trusted(path)
+
+    left, right = socket.socketpair()
+    with left, right:
+        assert daemon.peer_uid(left) in (None, uid)
+
+
+def test_daemon_forward(server, project, monkeypatch):
+    server, _ = server
+    child = os.path.join(project, 'fire', 'child')
+    monkeypatch.chdir(child)
+    code, printed = forward(server, ['greet', 'Rob'])
+    assert code == 0
+    assert f'Hello Rob from {child}!' in printed
+
+    monkeypatch.setenv('GREET_CODE', '3')
+    code, printed = forward(server, ['greet'])
+    assert code == 3
+    assert 'Hello World' in printed
+
+    code, printed = forward(server, ['not-exists'])
+    assert code == 20
+    assert 'Command "not-exists" not found.' in printed
+
+
+def test_daemon_reload(server, project):
+    server, _ = server
+    code, printed = forward(server, ['greet', 'Rob'])
+    assert 'Hello Rob' in printed
+
+    write_greet(project, 'Bye')
+    code, printed = forward(server, ['greet', 'Rob'])
+    assert code == 0
+    assert 'Bye Rob' in printed
+
+    os.remove(os.path.join(project, 'fire', 'greet.py'))
+    code, printed = forward(server, ['greet', 'Rob'])
+    assert code == 20
+
+
+def test_daemon_state(server):
+    server, fork = server
+    forward(server, ['count'])
+    code, printed = forward(server, ['count'])
+    assert code == 0
+    assert ('Count 1' if fork else 'Count 2') in printed
+
+
+def test_daemon_interrupt(server):
+    server, fork = server
+    if not fork:
+        pytest.skip('Only the fork server can interrupt a running command')
+    timer = threading.Timer(0.5, os.kill, (os.getpid(), signal.SIGINT))
+    timer.start()
+    start = time.time()
+    code, printed = forward(server, ['sleep'])
+    assert time.time() - start < 5
+    assert code == 130
+    assert 'Keyboard interrupt!' in printed
+
+
+def test_daemon_reap(project):
+    server = daemon.Daemon(None, os.path.join(project, 'fire'), fork=True)
+    pid = os.fork()
+    if not pid:
+        os._exit(0)
+    server.children.add(pid)
+    for _ in range(100):
+        server.reap()
+        if not server.children:
+            break
+        time.sleep(0.01)
+    assert server.children == set()
+    with pytest.raises(ChildProcessError):
+        os.waitpid(pid, os.WNOHANG)
@@ -0,0 +1,96 @@
+import os
+
+import pytest
+from clifire import application, command, out
+
+from tests.test_output import output
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs('src/pkg')
+    for name in ('a.py', 'b.py', 'pkg/c.py'):
+        with open(os.path.join('src', name), 'w') as file:
+            file.write(f'# {name}\n')
+    app = application.App(cache_folder=str(tmp_path / '.fire-cache'))
+    runs = []
+
+    @command.fire(inputs=['src/**/*.py'], outputs=['dist/out.txt'])
+    def build(cmd, name: str = 'out', _fail: bool = False):
+        runs.append(name)
+        out.info(f'Building {name}')
+        if _fail:
+            return 1
+        os.makedirs('dist', exist_ok=True)
+        with open('dist/out.txt', 'w') as file:
+            file.write(name)
+
+    yield app, runs
+    application.App.current_app = None
+
+
+def launch(app, command_line):
+    return app.get_command(command_line).launch(command_line)
+
+
+def test_fingerprint_skip(project, capsys):
+    app, runs = project
+    launch(app, 'build')
+    launch(app, 'build')
+    assert runs == ['out']
+    assert 'Command "build" is up to date' in output(capsys)
+
+    launch(app, 'build other')
+    launch(app, 'build other')
+    assert runs == ['out', 'other']
+
+    os.utime('src/a.py', ns=(0, 0))
+    launch(app, 'build other')
+    assert runs == ['out', 'other']
+
+    with open('src/pkg/c.py', 'a') as file:
+        file.write('# changed\n')
+    launch(app, 'build other')
+    assert runs == ['out', 'other', 'other']
+
+    with open('src/d.py', 'w') as file:
+        file.write('# new\n')
+    launch(app, 'build other')
+    assert runs == ['out', 'other', 'other', 'other']
+
+    os.remove('dist/out.txt')
+    launch(app, 'build other')
+    assert runs == ['out', 'other', 'other', 'other', 'other']
+
+
+def test_fingerprint_failure(project):
+    app, runs = project
+    assert launch(app, 'build --fail') == 1
+    assert launch(app, 'build --fail') == 1
+    assert runs == ['out', 'out']
+    launch(app, 'build')
+    launch(app, 'build')
+    assert runs == ['out', 'out', 'out']
+
+
+def test_fingerprint_command_class(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    app = application.App(cache_folder=str(tmp_path / '.fire-cache'))
+    runs = []
+
+    class CommandGenerate(command.Command):
+        _name = 'generate'
+        _inputs = ['schema.json']
+
+        def fire(self):
+            runs.append(True)
+
+    app.add_command(CommandGenerate)
+    launch(app, 'generate')
+    assert runs == [True]
+    with open('schema.json', 'w') as file:
+        file.write('{}')
+    launch(app, 'generate')
+    launch(app, 'generate')
+    assert runs == [True, True]
@@ -0,0 +1,49 @@
+import pytest
+from clifire import index
+
+
+def test_index_mapping():
+    commands = index.CommandIndex({'help': 'HELP', 'db.create': 'CREATE'})
+    commands['db.drop'] = 'DROP'
+    assert len(commands) == 3
+    assert list(commands) == ['help', 'db.create', 'db.drop']
+    assert commands['db.drop'] == 'DROP'
+    assert 'db' not in commands
+    assert commands.get('db') is None
+
+    del commands['db.create']
+    assert 'db.create' not in commands
+    assert commands.is_group(['db'])
+    del commands['db.drop']
+    assert not commands.is_group(['db'])
+    assert commands.node(['db']) is None
+    with pytest.raises(KeyError):
+        del commands['db.drop']
+
+
+def test_index_longest_match():
+    commands = index.CommandIndex(
+        {'ab': 'AB', 'ab.cd': 'AB_CD', 'ab.ef.gh': 'AB_EF_GH'}
+    )
+    assert commands.longest_match(['ab']) == 'AB'
+    assert commands.longest_match(['ab', 'cd', 'extra']) == 'AB_CD'
+    assert commands.longest_match(['ab', 'ef']) == 'AB'
+    assert commands.longest_match(['ab', 'ef', 'gh']) == 'AB_EF_GH'
+    assert commands.longest_match(['ab.ef.gh']) == 'AB_EF_GH'
+    assert commands.longest_match(['zz', 'ab']) is None
+    assert commands.longest_match([]) is None
+
+
+def test_index_groups():
+    commands = index.CommandIndex(
+        {'ab': 'AB', 'ab.cd': 'AB_CD', 'ab.ef.gh': 'AB_EF_GH', 'zz': 'ZZ'}
+    )
+    assert commands.is_group(['ab'])
+    assert commands.is_group(['ab', 'ef'])
+    assert not commands.is_group(['ab', 'cd'])
+    assert not commands.is_group(['zz'])
+    assert not commands.is_group(['xx'])
+    assert sorted(commands.children([])) == ['AB', 'AB_CD', 'AB_EF_GH', 'ZZ']
+    assert sorted(commands.children(['ab'])) == ['AB_CD', 'AB_EF_GH']
+    assert list(commands.children(['ab', 'ef'])) == ['AB_EF_GH']
+    assert list(commands.children(['xx'])) == []
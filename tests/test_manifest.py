@@ -0,0 +1,190 @@
+import json
+import os
+import tempfile
+import time
+from concurrent import futures
+
+import pytest
+from clifire import application, main, manifest
+
+from tests.test_output import output
+
+FILE_GREET = """
+from clifire import command, out
+
+out.info('Loading greet.py')
+
+
+@command.fire
+def greet(cmd, user: str = 'World', _loud: bool = False):
+    '''
+    Greet somebody
+
+    Args:
+        user: Name of the user to greet
+    '''
+    out.info(f'Hello {user}!')
+"""
+
+FILE_BUILD = """
+from clifire import command, out
+
+out.info('Loading build.py')
+
+
+@command.fire
+def build(cmd):
+    '''
+    Build the project
+    '''
+    out.info('Building')
+"""
+
+
+@pytest.fixture
+def project():
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        os.makedirs(os.path.join(tmpdirname, 'fire'))
+        for name, content in (('greet', FILE_GREET), ('build', FILE_BUILD)):
+            filename = os.path.join(tmpdirname, 'fire', f'{name}.py')
+            with open(filename, 'w') as file:
+                file.write(content)
+        os.chdir(tmpdirname)
+        try:
+            yield tmpdirname
+        finally:
+            os.chdir(cwd)
+            application.App.current_app = None
+
+
+def test_manifest_written(project, capsys):
+    main.main('greet Rob')
+    printed = output(capsys)
+    assert 'Loading greet.py' in printed
+    assert 'Loading build.py' in printed
+    assert 'Hello Rob!' in printed
+
+    filename = os.path.join(project, manifest.MANIFEST_FILE)
+    assert os.path.exists(filename)
+    with open(filename) as file:
+        data = json.load(file)
+    assert sorted(data['files']) == ['build.py', 'greet.py']
+    greet = data['files']['greet.py']['commands'][0]
+    assert greet['name'] == 'greet'
+    assert greet['help'] == 'Greet somebody'
+    assert [f['name'] for f in greet['fields']] == ['loud', 'user']
+    assert greet['depends'] == []
+
+
+def test_manifest_load_only_command_file(project, capsys):
+    main.main('greet Rob')
+    output(capsys)
+
+    main.main('greet Rob')
+    printed = output(capsys)
+    assert 'Loading greet.py' in printed
+    assert 'Loading build.py' not in printed
+    assert 'Hello Rob!' in printed
+
+    main.main('build')
+    printed = output(capsys)
+    assert 'Loading greet.py' not in printed
+    assert 'Loading build.py' in printed
+    assert 'Building' in printed
+
+
+def test_manifest_help_without_loading(project, capsys):
+    main.main('help')
+    output(capsys)
+
+    main.main('help')
+    printed = output(capsys)
+    assert 'Loading' not in printed
+    assert 'Greet somebody' in printed
+    assert 'Build the project' in printed
+
+    main.main('help greet')
+    printed = output(capsys)
+    assert 'Loading' not in printed
+    assert 'Name of the user to greet' in printed
+    assert '--loud' in printed
+
+
+def test_manifest_invalidated_by_stat(project, capsys):
+    main.main('help')
+    output(capsys)
+
+    filename = os.path.join(project, 'fire', 'build.py')
+    with open(filename, 'a') as file:
+        file.write(
+            '\n\n@command.fire\ndef clean(cmd):\n    out.info("Clean")\n'
+        )
+    main.main('clean')
+    printed = output(capsys)
+    assert 'Loading greet.py' in printed
+    assert 'Clean' in printed
+
+    os.remove(filename)
+    main.main('help')
+    printed = output(capsys)
+    assert 'Loading greet.py' in printed
+    assert 'clean' not in printed
+
+
+def test_manifest_command_removed(project, capsys):
+    main.main('help')
+    output(capsys)
+
+    fire_manifest = manifest.Manifest(os.path.join(project, 'fire'))
+    assert fire_manifest.is_valid()
+    fire_manifest.files['build.py']['commands'][0]['name'] = 'build.all'
+    fire_manifest.write()
+    with pytest.raises(SystemExit) as excinfo:
+        main.main('build all')
+    assert '30' == str(excinfo.value)
+    assert 'The command "build.all" is not defined' in output(capsys)
+
+
+def test_manifest_field_types(project, capsys):
+    main.main('help')
+    output(capsys)
+
+    fire_manifest = manifest.Manifest(os.path.join(project, 'fire'))
+    assert fire_manifest.is_valid()
+    data = fire_manifest.files['greet.py']['commands'][0]
+    cls = fire_manifest.load_command('greet.py', data)
+    fields = cls._get_schema().fields
+    assert fields['loud'].type is bool
+    assert fields['loud'].default is False
+    assert fields['user'].type is str
+    assert fields['user'].default == 'World'
+
+    with open('items.txt', 'w') as file:
+        file.write('Rob\nAnn\n')
+    main.main('greet --each items.txt --loud')
+    printed = output(capsys)
+    assert 'Hello Rob!' in printed
+    assert 'Hello Ann!' in printed
+
+
+def test_manifest_load_once_from_threads(project, capsys, monkeypatch):
+    main.main('help')
+    output(capsys)
+    app = application.App()
+    main.load(os.path.join(project, 'fire'))
+    assert issubclass(app.commands['greet'], manifest.LazyCommand)
+    loaded = []
+    load_file = main.load_file
+
+    def slow_load_file(path):
+        loaded.append(path)
+        time.sleep(0.1)
+        return load_file(path)
+
+    monkeypatch.setattr(main, 'load_file', slow_load_file)
+    with futures.ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(app.run, [f'greet u{i}' for i in range(4)]))
+    assert len(loaded) == 1
+    assert [res.code for res in results] == [0] * 4
+    assert 'Hello u3!' in results[3].stdout
@@ -53,6 +53,32 @@ def test_debug(capsys):
     assert 'Debug sample message\n' == output(capsys)
 
 
+def test_debug_lazy(capsys):
+    calls = []
+
+    def message():
+        calls.append(1)
+        return 'Lazy message'
+
+    out.debug('Value %s = %d%%', 'x', 10)
+    out.debug2(message)
+    assert 'Value x = 10%\n· Lazy message\n' == output(capsys)
+    app = application.App(option_ansi=False)
+    out.debug('Hidden %s', 'message')
+    out.debug2(message)
+    assert '' == output(capsys)
+    assert 1 == len(calls)
+    app.set_option('verbose', True)
+    assert 1 == out.VERBOSE
+    out.debug('Shown %s', 'message')
+    assert 'Shown message\n' == output(capsys)
+    app.set_option('verbose', False)
+    assert 0 == out.VERBOSE
+    application.App.current_app = None
+    out.debug('No app')
+    assert 'No app\n' == output(capsys)
+
+
 def test_live_text():
     buffer = StringIO()
     original_console = out.CONSOLE
@@ -279,3 +305,148 @@ def test_no_ansi(capsys):
     assert '▲ Warn' in output(capsys)
     out.error('Error', icon=True)
     assert '✗ Error' in output(capsys)
+
+
+def test_table_stream(capsys):
+    def rows(count):
+        for i in range(count):
+            yield {'name': f'[bold]user{i}', 'age': i, 'bio': 'x' * i}
+
+    out.table(rows(3), border=False, title='Users')
+    assert [line.rstrip() for line in output(capsys).splitlines()] == [
+        'Users',
+        '  Name         Age  Bio',
+        '  [bold]user0    0',
+        '  [bold]user1    1  x',
+        '  [bold]user2    2  xx',
+    ]
+
+    out.table_stream(rows(3), widths=[6, 3, 3], sample=1)
+    assert output(capsys) == (
+        '┌────────┬─────┬─────┐\n'
+        '│ Name   │ Age │ Bio │\n'
+        '├────────┼─────┼─────┤\n'
+        '│ [bold… │   0 │     │\n'
+        '│ [bold… │   1 │ x   │\n'
+        '│ [bold… │   2 │ xx  │\n'
+        '└────────┴─────┴─────┘\n'
+    )
+
+    out.table_stream(rows(2500), chunk_size=1000, show_header=False)
+    printed = output(capsys).splitlines()
+    assert len(printed) == 2502
+    assert printed[-2].startswith('│ [bold]user2… │ 2499 │ xxx')
+
+    out.table_stream(iter([]))
+    assert output(capsys) == ''
+
+    out.table(rows(2), padding=(0, 2), style='red')
+    printed = output(capsys).splitlines()
+    assert printed[1] == '│  Name         │  Age  │  Bio  │'
+    assert printed[4] == '│  [bold]user1  │    1  │  x    │'
+    with pytest.raises(ValueError):
+        out.table(rows(2), padding=(1, 2))
+
+
+class FakeDtype:
+    def __init__(self, kind, names=None):
+        self.kind = kind
+        self.names = names
+
+
+class FakeColumn:
+    def __init__(self, values, kind):
+        self.values = values
+        self.dtype = FakeDtype(kind)
+
+    def tolist(self):
+        return list(self.values)
+
+
+class FakeArray:
+    def __init__(self, rows, names=None, kinds=''):
+        self.rows = rows
+        self.names = names
+        self.kinds = kinds
+        self.shape = (len(rows), len(rows[0]))
+        self.dtype = FakeDtype('V' if names else 'O', names)
+
+    def __array__(self):
+        return self
+
+    def __getitem__(self, name):
+        index = self.names.index(name)
+        return FakeColumn([row[index] for row in self.rows], self.kinds[index])
+
+    @property
+    def T(self):
+        return [
+            FakeColumn(column, kind)
+            for column, kind in zip(zip(*self.rows), self.kinds)
+        ]
+
+
+def test_table_columnar(capsys):
+    def table_lines(*args, **kwargs):
+        out.table(*args, border=False, **kwargs)
+        return [line.rstrip() for line in output(capsys).splitlines()]
+
+    expected = [
+        '  Name         Age',
+        '  Luke          18',
+        '  Elizabeth    101',
+    ]
+    rows = [('Luke', 18), ('Elizabeth', 101)]
+    assert table_lines({'name': ['Luke', 'Elizabeth'], 'age': [18, 101]}) == (
+        expected
+    )
+    assert table_lines(rows, headers=['name', 'age']) == expected
+    assert table_lines(iter(rows), headers=['name', 'age']) == [
+        '  Name       Age',
+        '  Luke        18',
+        '  Elizabeth  101',
+    ]
+    assert (
+        table_lines(FakeArray(rows, names=('name', 'age'), kinds='Ui'))
+        == expected
+    )
+    assert (
+        table_lines(FakeArray(rows, kinds='Ui'), headers=['name', 'age'])
+        == expected
+    )
+
+    assert table_lines({'age': [18, 'unknown']}) == [
+        '  Age',
+        '  18',
+        '  unknown',
+    ]
+    assert table_lines({'name': []}) == []
+    assert table_lines([], headers=['name']) == []
+
+
+def test_plain_writer(capsys, monkeypatch):
+    for name in ('ANSI', 'PLAIN', 'ICON_SHOW'):
+        monkeypatch.setattr(out, name, getattr(out, name))
+    monkeypatch.delenv('FORCE_COLOR', raising=False)
+    out.setup(ansi=True, show_icons=False)
+    assert out.PLAIN is True
+    output(capsys)
+    out.info('Plain message')
+    out.success('Done')
+    out.error('[bold]Markup[/bold] message')
+    assert output(capsys) == 'Plain message\nDone\nMarkup message\n'
+
+    out.setup(ansi=False, show_icons=False)
+    output(capsys)
+    out.success('Done')
+    out.warn('Careful')
+    assert output(capsys) == '✓ Done\n▲ Careful\n'
+
+    with out.use_console(out.capture_console()) as console:
+        out.info('Captured')
+    assert console.file.getvalue() == 'Captured\n'
+    assert output(capsys) == ''
+
+    monkeypatch.setenv('FORCE_COLOR', '1')
+    out.setup(ansi=True, show_icons=False)
+    assert out.PLAIN is False
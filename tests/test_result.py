@@ -1,4 +1,6 @@
-from clifire import result
+from clifire import application, result
+
+from tests.test_output import output
 
 
 def test_result():
@@ -19,3 +21,27 @@ def test_result():
     assert res.code == 99
     assert res.stdout == ''
     assert res.stderr == 'ERROR'
+
+
+def test_result_bytes():
+    raw = b'{"name": "clifire",\r\n"lines": 2}\n'
+    res = result.Result(0, raw, b'warning\n')
+    assert res._text == {}
+    assert res.bytes is raw
+    assert list(res.lines()) == ['{"name": "clifire",', '"lines": 2}']
+    assert res.json() == {'name': 'clifire', 'lines': 2}
+    assert res._text == {}
+    assert res.stdout == '{"name": "clifire",\r\n"lines": 2}'
+    assert res.stderr == 'warning'
+
+    res.stdout = 'one\ntwo\n'
+    assert res.stdout == 'one\ntwo'
+    assert list(res.lines()) == ['one', 'two']
+    assert res.bytes == b'one\ntwo\n'
+    assert result.Result(0, None).stdout == ''
+
+
+def test_result_debug_size(capsys):
+    application.App.current_app = None
+    result.Result(0, 'añb', b'a\xc3\xb1b')
+    assert 'stdout 3 chars, stderr 4 bytes' in output(capsys)
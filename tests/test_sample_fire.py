@@ -1,12 +1,14 @@
 import getpass
 import importlib
+import io
+import json
 import os
 import runpy
 import sys
 from contextlib import contextmanager
 
 import pytest
-from clifire import application, main
+from clifire import application, main, out
 
 from tests.test_output import output
 
@@ -148,3 +150,101 @@ def test_fire_group_help(capsys):
 
     app.fire('zz command')
     assert 'def_zz_command' in output(capsys)
+
+
+def test_fire_main_batch(capsys, tmp_path, monkeypatch):
+    batch_file = tmp_path / 'batch.txt'
+    batch_file.write_text(
+        '# Sample batch\nhello Rob\n\nnodoc\nnot-exists\nhello -v Elvis\n'
+    )
+    with in_path('sample'):
+        with pytest.raises(SystemExit) as excinfo:
+            main.main(f'--batch {batch_file}')
+    assert '1' == str(excinfo.value)
+    printed = output(capsys)
+    assert 'Hi Rob!' in printed
+    assert 'Command without doc' in printed
+    assert 'Hi Elvis!' in printed
+    assert 'Line 5 exited with code 20: not-exists' in printed
+    assert '1 of 4 command lines failed.' in printed
+
+    batch_file.write_text('hello Rob\nnodoc\n')
+    with in_path('sample'):
+        main.main(f'--batch={batch_file}')
+    assert '2 command lines executed.' in output(capsys)
+
+    monkeypatch.setattr(sys, 'stdin', io.StringIO('hello Stdin\n'))
+    with in_path('sample'):
+        main.main('--batch -')
+    printed = output(capsys)
+    assert 'Hi Stdin!' in printed
+    assert '1 command lines executed.' in printed
+
+    with in_path('sample'):
+        with pytest.raises(SystemExit):
+            main.main('--batch not-exists.txt')
+    assert 'Batch file "not-exists.txt" not found.' in output(capsys)
+
+
+def test_fire_main_batch_json(capsys, tmp_path, monkeypatch):
+    for name in ('OUTPUT', 'PLAIN', 'ANSI'):
+        monkeypatch.setattr(out, name, getattr(out, name))
+    batch_file = tmp_path / 'batch.txt'
+    batch_file.write_text('hello Rob\nhello Ann\n')
+    with in_path('sample'):
+        with pytest.raises(SystemExit) as excinfo:
+            main.main(f'--output json --batch {batch_file}')
+    assert '40' == str(excinfo.value)
+    records = json.loads(output(capsys))
+    assert records[-1] == {'level': 'exit', 'code': 40}
+    assert 'use --output ndjson' in records[0]['msg']
+
+    with in_path('sample'):
+        main.main(f'--output ndjson --batch {batch_file}')
+    records = [json.loads(line) for line in output(capsys).splitlines()]
+    assert [r['code'] for r in records if r['level'] == 'exit'] == [0, 0, 0]
+
+
+FIRE_EXPORT = """
+from clifire import command, out
+
+
+@command.fire
+def export(
+    cmd,
+    _jobs: bool = False,
+    _batch: str = '',
+    _each: str = '',
+    _daemon: bool = False,
+):
+    out.info(
+        f'Export jobs={cmd.jobs} batch={cmd.batch} each={cmd.each} '
+        f'daemon={cmd.daemon}'
+    )
+"""
+
+
+@pytest.fixture
+def export_path(tmp_path, monkeypatch):
+    (tmp_path / 'fire.py').write_text(FIRE_EXPORT)
+    monkeypatch.chdir(tmp_path)
+    yield tmp_path
+    application.App.current_app = None
+
+
+def test_fire_main_command_short_alias(export_path, capsys):
+    main.main('export -j')
+    assert 'Export jobs=True' in output(capsys)
+
+
+def test_fire_main_command_each(export_path, capsys):
+    main.main('export --each users.txt')
+    assert 'each=users.txt' in output(capsys)
+
+
+def test_fire_main_command_options(export_path, capsys):
+    main.main('export --batch users.txt --daemon')
+    assert 'batch=users.txt each= daemon=True' in output(capsys)
+    (export_path / 'batch.txt').write_text('export --batch rows.txt\n')
+    main.main('--batch batch.txt')
+    assert 'batch=rows.txt' in output(capsys)
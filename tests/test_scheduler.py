@@ -0,0 +1,115 @@
+import threading
+import time
+
+import pytest
+from clifire import application, command, out, scheduler
+
+from tests.test_output import output
+
+
+@pytest.fixture
+def app():
+    app = application.App()
+    app.add_option('jobs', command.Field(default=1))
+    yield app
+    application.App.current_app = None
+
+
+def test_scheduler_parallel(app, capsys):
+    runs = []
+    lock = threading.Lock()
+
+    def step(name):
+        with lock:
+            runs.append(name)
+        time.sleep(0.3)
+
+    @command.fire
+    def lint(cmd):
+        step('lint')
+
+    @command.fire
+    def compile(cmd, target: str = 'all'):
+        step(f'compile {target}')
+
+    @command.fire(depends=['compile', 'lint'])
+    def package(cmd):
+        step('package')
+
+    @command.fire(depends=['package', 'compile docs', 'lint'])
+    def release(cmd):
+        out.info(f'Released after {", ".join(runs)}')
+
+    graph = scheduler.Scheduler(app).graph(['release'])
+    assert graph == {
+        'compile': [],
+        'lint': [],
+        'package': ['compile', 'lint'],
+        'compile docs': [],
+        'release': ['package', 'compile docs', 'lint'],
+    }
+
+    started = time.time()
+    app.fire('release --jobs 3')
+    assert time.time() - started < 0.9
+    assert sorted(runs[:3]) == ['compile all', 'compile docs', 'lint']
+    assert runs[3:] == ['package']
+    assert 'Released after' in output(capsys)
+
+    runs.clear()
+    started = time.time()
+    app.fire('release --jobs=1')
+    assert time.time() - started > 1.1
+    assert len(runs) == 4
+
+
+def test_scheduler_failure(app, capsys):
+    runs = []
+
+    @command.fire
+    def fail(cmd):
+        time.sleep(0.1)
+        return 3
+
+    @command.fire
+    def slow(cmd):
+        time.sleep(0.3)
+        runs.append('slow')
+
+    @command.fire(depends=['slow'])
+    def after(cmd):
+        runs.append('after')
+
+    @command.fire(depends=['fail', 'after'])
+    def all(cmd):
+        runs.append('all')
+
+    with pytest.raises(SystemExit) as excinfo:
+        app.fire('all --jobs 2')
+    assert '3' == str(excinfo.value)
+    assert runs == ['slow']
+    assert 'Dependency "fail" failed' in output(capsys)
+
+
+def test_scheduler_errors(app, capsys):
+    @command.fire(depends=['second'])
+    def first(cmd):
+        pass
+
+    @command.fire(depends=['first'])
+    def second(cmd):
+        pass
+
+    @command.fire(depends=['missing'])
+    def third(cmd):
+        pass
+
+    with pytest.raises(SystemExit) as excinfo:
+        app.fire('first')
+    assert '30' == str(excinfo.value)
+    assert 'Dependency cycle: second -> first -> second' in output(capsys)
+
+    with pytest.raises(SystemExit) as excinfo:
+        app.fire('third')
+    assert '30' == str(excinfo.value)
+    assert 'The dependency "missing" is not a command' in output(capsys)
@@ -0,0 +1,42 @@
+import os
+
+from clifire import application
+
+
+def test_shell_session(tmp_path):
+    app = application.App()
+    with app.shell_session(env={'MY_ENV_VALUE': 'is_ok!'}) as session:
+        res = session.shell('echo $MY_ENV_VALUE')
+        assert res.code == 0
+        assert res.stdout == 'is_ok!'
+
+        res = session.shell(f'cd {tmp_path}; export OTHER=value')
+        assert res.code == 0
+        assert res.stdout == ''
+        assert session.shell('pwd').stdout == str(tmp_path)
+        assert session.shell('echo $OTHER').stdout == 'value'
+        assert os.getcwd() != str(tmp_path)
+
+        res = session.shell('printf "no newline"; echo error >&2; false')
+        assert res.code == 1
+        assert res.stdout == 'no newline'
+        assert res.stderr == 'error'
+
+        res = session.shell('seq 1 20000')
+        assert len(res.stdout.splitlines()) == 20000
+
+        res = session.shell('if', check=True)
+        assert isinstance(res, application.result.ResultError)
+        assert res.code == 2
+
+        res = session.shell('cat')
+        assert res.code == 0
+
+        for i in range(100):
+            assert session.shell(f'echo {i}').stdout == str(i)
+
+        res = session.shell('echo bye; exit 4')
+        assert res.code == 4
+        assert res.stdout == 'bye'
+        assert not session.is_alive
+        assert session.shell('echo closed').stderr == 'Shell session is closed'
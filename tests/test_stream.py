@@ -0,0 +1,55 @@
+import time
+
+from clifire import application, stream
+
+from tests.test_output import output
+
+
+def test_shell_stream():
+    app = application.App()
+    started = time.time()
+    with app.shell_stream('echo first; sleep 1; echo second') as lines:
+        first = next(iter(lines))
+        assert first == 'first'
+        assert time.time() - started < 0.9
+        res = lines.wait()
+    assert res.code == 0
+    assert res.stdout == 'first\nsecond'
+    assert lines.line_count == 2
+
+
+def test_shell_stream_tail():
+    app = application.App()
+    seen = []
+    errors = []
+    lines = app.shell_stream(
+        'seq 1 10000; echo error >&2; exit 3',
+        on_line=seen.append,
+        on_stderr=errors.append,
+        tail=3,
+    )
+    res = lines.wait()
+    assert res.code == 3
+    assert res.stdout == '9998\n9999\n10000'
+    assert res.stderr == 'error'
+    assert len(seen) == 10000
+    assert errors == ['error']
+    assert len(lines.stdout) == 3
+
+
+def test_shell_tee(capsys):
+    app = application.App()
+    res = app.shell('echo "[bold]Hello"; echo World', tee=True, tail=1)
+    assert res.stdout == 'World'
+    assert output(capsys) == '[bold]Hello\nWorld\n'
+
+    res = app.shell('echo fail >&2; exit 2', check=True, tail=10)
+    assert isinstance(res, application.result.ResultError)
+    assert res.code == 2
+    assert res.stderr == 'fail'
+
+    seen = []
+    res = app.shell('seq 1 5000', on_line=seen.append)
+    assert len(seen) == 5000
+    assert len(res.stdout.splitlines()) == stream.TAIL
+    assert res.stdout.endswith('\n5000')
@@ -15,6 +15,7 @@ def test_app_template(temp_dir):
     folder = os.path.join(os.path.dirname(__file__), 'sample', 'template')
     app = application.App(template_folder=folder)
     assert folder == app.template.path()
+    assert app.template._jinja2 is None
     kwargs = {
         'title': 'sample',
         'user': 'root',